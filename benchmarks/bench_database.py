@@ -0,0 +1,111 @@
+"""Concurrent read/write throughput of the old and new database setup.
+
+"before" is sqlite's defaults (rollback journal, synchronous=FULL), as the
+original Database used them. "after" is the WAL-tuned ConnectionPool.
+Reader threads repeatedly load the active alarms while one writer commits
+single-row updates. Run from the repository root:
+
+    python benchmarks/bench_database.py --alarms 10000 --readers 3 --seconds 3
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.pool import ConnectionPool
+
+SCHEMA = """
+CREATE TABLE alarms (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    time TEXT, sound_path TEXT, note TEXT, active BOOLEAN,
+    snooze_count INTEGER DEFAULT 0
+)
+"""
+
+
+def populate(path, count):
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    conn.executemany("INSERT INTO alarms (time, sound_path, note, active) VALUES (?, ?, ?, 1)",
+                     ((f"{i // 60 % 24:02d}:{i % 60:02d}", "default_alarm.wav", f"alarm {i}")
+                      for i in range(count)))
+    conn.commit()
+    conn.close()
+
+
+def run(connect, alarms, readers, seconds):
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "busy": 0}
+    lock = threading.Lock()
+
+    def reader():
+        conn = connect()
+        done = busy = 0
+        while not stop.is_set():
+            try:
+                conn.execute("SELECT id, time, sound_path, note FROM alarms WHERE active = 1").fetchall()
+                done += 1
+            except sqlite3.OperationalError:
+                busy += 1
+        with lock:
+            counts["reads"] += done
+            counts["busy"] += busy
+
+    def writer():
+        conn = connect()
+        done = busy = 0
+        while not stop.is_set():
+            try:
+                with conn:
+                    conn.execute("UPDATE alarms SET snooze_count = snooze_count + 1 WHERE id = ?",
+                                 (done % alarms + 1,))
+                done += 1
+            except sqlite3.OperationalError:
+                busy += 1
+        with lock:
+            counts["writes"] += done
+            counts["busy"] += busy
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {key: value / seconds for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alarms", type=int, default=10000)
+    parser.add_argument("--readers", type=int, default=3)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = os.path.join(tmp, "before.db")
+        populate(before_path, args.alarms)
+        before = run(lambda: sqlite3.connect(before_path, timeout=0.1),
+                     args.alarms, args.readers, args.seconds)
+
+        after_path = os.path.join(tmp, "after.db")
+        populate(after_path, args.alarms)
+        pool = ConnectionPool(after_path, timeout=0.1)
+        after = run(pool.connection, args.alarms, args.readers, args.seconds)
+        pool.close()
+
+    for name, result in (("before", before), ("after", after)):
+        print(f"{name:<7} {result['reads']:9.1f} reads/s  {result['writes']:9.1f} writes/s  "
+              f"{result['busy']:7.1f} busy errors/s")
+
+
+if __name__ == "__main__":
+    main()
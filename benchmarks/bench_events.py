@@ -0,0 +1,81 @@
+"""Aggregate query latency over a year of alarm event history.
+
+Every alarm fires once a day, is snoozed on some days and is then
+stopped. The benchmark times the "last 30 days" aggregates of
+src.data.events.AlarmEvents. Run from the repository root:
+
+    python benchmarks/bench_events.py --alarms 200 --days 365
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.database import Database
+from src.data.events import AlarmEvents, EVENT_FIRED, EVENT_SNOOZED, EVENT_STOPPED, DAY
+
+
+def populate(db, alarms, days, now):
+    rng = random.Random(0)
+
+    def rows():
+        for day in range(days, 0, -1):
+            for alarm_id in range(1, alarms + 1):
+                at = now - day * DAY + alarm_id
+                yield alarm_id, EVENT_FIRED, at, None
+                for _ in range(rng.choice((0, 0, 1, 2))):
+                    yield alarm_id, EVENT_SNOOZED, at + 60, rng.uniform(5, 60)
+                yield alarm_id, EVENT_STOPPED, at + 120, rng.uniform(5, 120)
+
+    conn = db.conn
+    with conn:
+        conn.executemany("INSERT INTO alarm_events (alarm_id, kind, at, duration) VALUES (?, ?, ?, ?)",
+                         rows())
+    return conn.execute("SELECT COUNT(*) FROM alarm_events").fetchone()[0]
+
+
+def timed(query, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        query()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e3, max(samples) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alarms", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    now = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "alarms.db"))
+        count = populate(db, args.alarms, args.days, now)
+        events = AlarmEvents(db)
+        print(f"{count} events for {args.alarms} alarms over {args.days} days")
+        queries = {
+            "snoozes per alarm, 30 days": lambda: events.snoozes_per_alarm(30, now),
+            "time to stop per alarm, 30 days": lambda: events.time_to_stop(30, now),
+            "history of one alarm": lambda: events.history(1, now - 30 * DAY),
+        }
+        for name, query in queries.items():
+            median, worst = timed(query, args.runs)
+            print(f"{name:<34} {median:7.2f} ms median  {worst:7.2f} ms max")
+        start = time.perf_counter()
+        for _ in range(1000):
+            events.record(1, EVENT_FIRED)
+        print(f"{'record() call':<34} {(time.perf_counter() - start) * 1e3:7.2f} ms per 1000 (queued, not committed)")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
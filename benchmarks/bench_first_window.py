@@ -0,0 +1,79 @@
+"""Time from interpreter start to the first painted main window.
+
+"before" waits for pygame's import and mixer.init before building the UI,
+as the clock used to. "after" is the current startup, where the mixer
+comes up in the background after first paint. Each run uses a fresh
+interpreter and needs a display. Run from the repository root:
+
+    python benchmarks/bench_first_window.py --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import tkinter as tk
+from src.core.smart_alarm_clock import SmartAlarmClock
+from src.ui.modern_ui import ModernAlarmClockUI
+root = tk.Tk()
+app = SmartAlarmClock(root)
+if {eager}:
+    try:
+        app.audio.wait_ready()
+    except Exception:
+        pass
+ui = ModernAlarmClockUI(root, app)
+app.set_ui(ui)
+# Map and paint the window, then stop the clock
+root.update()
+first_window = time.perf_counter() - start
+try:
+    app.audio.wait_ready(timeout=10)
+    audio_ready = time.perf_counter() - start
+except Exception:
+    audio_ready = None
+app.on_closing()
+print(json.dumps({{"first_window_ms": first_window * 1e3,
+                  "audio_ready_ms": audio_ready and audio_ready * 1e3}}))
+"""
+
+
+def run_case(eager):
+    result = subprocess.run([sys.executable, "-c", PROBE.format(eager=eager)],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, (result.stderr.strip().splitlines() or ["no output"])[-1]
+    return json.loads(result.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, eager in (("before", True), ("after", False)):
+        samples = []
+        error = None
+        for _ in range(args.runs):
+            sample, error = run_case(eager)
+            if sample is None:
+                break
+            samples.append(sample)
+        if not samples:
+            print(f"{name:<7} unavailable: {error}")
+            continue
+        window = statistics.median(s["first_window_ms"] for s in samples)
+        ready = [s["audio_ready_ms"] for s in samples if s["audio_ready_ms"] is not None]
+        audio = f"{statistics.median(ready):8.1f} ms" if ready else "     n/a"
+        print(f"{name:<7} first window {window:8.1f} ms  audio ready {audio}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Bulk import throughput versus saving alarms one at a time.
+
+"before" calls Database.save_alarm per row, as the UI does, on a sample of
+--sample rows and extrapolates to the full count. "after" streams a CSV
+file through src.data.transfer.import_alarms. Run from the repository root:
+
+    python benchmarks/bench_import.py --alarms 500000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.database import Database
+from src.data.transfer import import_alarms
+
+
+def write_csv(path, count):
+    with open(path, "w", newline="") as f:
+        f.write("time,sound_path,note,repeat_rule,repeat_value,repeat_anchor\n")
+        for i in range(count):
+            rule = "weekdays,31," if i % 4 == 0 else ",,"
+            f.write(f"{i // 60 % 24:02d}:{i % 60:02d},default_alarm.wav,alarm {i},{rule}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alarms", type=int, default=500000)
+    parser.add_argument("--sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "before.db"))
+        start = time.perf_counter()
+        for i in range(args.sample):
+            db.save_alarm(f"{i // 60 % 24:02d}:{i % 60:02d}", "default_alarm.wav", f"alarm {i}")
+        per_row = (time.perf_counter() - start) / args.sample
+        db.close()
+
+        csv_path = os.path.join(tmp, "alarms.csv")
+        write_csv(csv_path, args.alarms)
+        db = Database(os.path.join(tmp, "after.db"))
+        start = time.perf_counter()
+        result = import_alarms(db, csv_path)
+        elapsed = time.perf_counter() - start
+        db.close()
+
+    print(f"before  {per_row * 1e3:7.3f} ms/alarm  ~{per_row * args.alarms:8.1f} s for {args.alarms} alarms")
+    print(f"after   {elapsed / args.alarms * 1e3:7.3f} ms/alarm  {elapsed:9.1f} s for {result.imported} alarms")
+
+
+if __name__ == "__main__":
+    main()
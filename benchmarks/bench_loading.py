@@ -0,0 +1,81 @@
+"""Startup cost of loading every alarm versus the paged alarm window.
+
+"before" reads all active alarms and schedules them, as startup used to.
+"after" builds an AlarmWindow and refills it once, which reads only the
+pages covering the next hour. Alarms are spread evenly over the day. Time
+and Python heap peak (tracemalloc) are measured per alarm count. Run from
+the repository root:
+
+    python benchmarks/bench_loading.py --counts 100,10000,100000,1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.alarm import Alarm
+from src.core.scheduler import create_scheduler
+from src.core.window import AlarmWindow
+from src.data.database import ALARM_COLUMNS, Database
+
+
+def populate(db, count):
+    conn = db.conn
+    with conn:
+        conn.executemany("INSERT INTO alarms (time, sound_path, note, active) VALUES (?, ?, ?, 1)",
+                         ((f"{i * 1440 // count // 60:02d}:{i * 1440 // count % 60:02d}",
+                           "default_alarm.wav", f"alarm {i}")
+                          for i in range(count)))
+
+
+def load_all(db):
+    scheduler = create_scheduler("heap")
+    rows = db.conn.execute(f"SELECT {ALARM_COLUMNS} FROM alarms WHERE active = 1").fetchall()
+    scheduler.load([Alarm.from_row(row) for row in rows])
+    return scheduler
+
+
+def load_window(db):
+    scheduler = create_scheduler("heap")
+    window = AlarmWindow(db, scheduler, {})
+    with scheduler.condition:
+        window.refill()
+    return scheduler
+
+
+def measure(load, db):
+    # Timed and traced separately; tracemalloc slows allocation-heavy code
+    start = time.perf_counter()
+    scheduled = len(load(db))
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    load(db)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, scheduled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", default="100,10000,100000,1000000",
+                        help="comma-separated alarm counts")
+    args = parser.parse_args()
+
+    for count in (int(c) for c in args.counts.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "alarms.db"))
+            populate(db, count)
+            for name, load in (("before", load_all), ("after", load_window)):
+                elapsed, peak, scheduled = measure(load, db)
+                print(f"{count:>8} alarms  {name:<7} {elapsed * 1e3:9.1f} ms  "
+                      f"{peak / 2**20:8.1f} MiB peak  {scheduled:>8} scheduled")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
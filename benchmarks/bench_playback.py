@@ -0,0 +1,73 @@
+"""Cost of starting an alarm sound once it is decoded and cached.
+
+Times AudioManager.play_alarm through the channel pool, with and without
+the volume ramp, against a bare Sound.play. The mixer runs on SDL's dummy
+driver, so no sound card is needed. Run from the repository root:
+
+    python benchmarks/bench_playback.py --runs 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.settings import Settings
+from src.utils.audio_manager import AudioManager
+from src.utils.create_default_sound import create_beep_sound
+
+
+def timed(start, stop, runs):
+    samples = []
+    for _ in range(runs):
+        begin = time.perf_counter()
+        playing = start()
+        samples.append(time.perf_counter() - begin)
+        stop(playing)
+    samples.sort()
+    return statistics.median(samples) * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--concurrent", type=int, default=3,
+                        help="sounds already playing while timing")
+    args = parser.parse_args()
+
+    audio = AudioManager(Settings())
+    try:
+        audio.wait_ready(timeout=10)
+    except Exception as e:
+        print(f"unavailable: {e}")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "beep.wav")
+        create_beep_sound(path, duration=1.0, frequency=880.0)
+        audio.preload(path).result()
+        sound = audio.cache.get(path)
+        # Other alarms keep ringing while the measured one starts
+        background = [audio.play_alarm(path) for _ in range(args.concurrent)]
+
+        cases = {
+            "Sound.play": (lambda: sound.play(-1), lambda channel: channel.stop()),
+            "play_alarm": (lambda: audio.play_alarm(path), audio.stop_alarm),
+            "play_alarm+ramp": (lambda: audio.play_alarm(path, gradual=True), audio.stop_alarm),
+        }
+        for name, (start, stop) in cases.items():
+            median, p99 = timed(start, stop, args.runs)
+            print(f"{name:<16} median {median:7.1f} us  p99 {p99:7.1f} us")
+        print(f"still playing: {sum(h.playing for h in background)}/{args.concurrent}, "
+              f"cache hit rate {audio.cache.stats()['hit_rate']:.1%}, "
+              f"preemptions {audio.channels.preemptions}")
+    audio.stop_alarm()
+    audio.quit()
+
+
+if __name__ == "__main__":
+    main()
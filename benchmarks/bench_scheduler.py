@@ -0,0 +1,91 @@
+"""Compare the scheduler backends against the old per-second polling loop.
+
+Run from the repository root:
+
+    python benchmarks/bench_scheduler.py --counts 1000 10000 100000
+"""
+import argparse
+import datetime
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.alarm import Alarm, format_time
+from src.core.scheduler import create_scheduler
+
+
+def make_alarms(count):
+    return [Alarm(i, random.randrange(24 * 60), "default_alarm.wav") for i in range(count)]
+
+
+def bench_polling(alarms, ticks=5):
+    """Cost of the original check_alarms body, extrapolated to a full day"""
+    legacy = [{"time": format_time(a.minute), "sound_path": a.sound_path, "note": a.note}
+              for a in alarms]
+    start = time.perf_counter()
+    for _ in range(ticks):
+        current_time = datetime.datetime.now()
+        for alarm in legacy:
+            alarm_time = datetime.datetime.strptime(alarm["time"], "%H:%M").time()
+            if (current_time.hour == alarm_time.hour and
+                    current_time.minute == alarm_time.minute):
+                pass
+    per_tick = (time.perf_counter() - start) / ticks
+    return {"per_tick_ms": per_tick * 1e3, "day_s": per_tick * 86400, "wakeups": 86400}
+
+
+def bench_backend(backend, alarms):
+    scheduler = create_scheduler(backend)
+
+    start = time.perf_counter()
+    scheduler.load(alarms)
+    load_s = time.perf_counter() - start
+
+    # Insert/cancel churn on a sample of alarms
+    sample = alarms[:min(len(alarms), 10000)]
+    start = time.perf_counter()
+    for alarm in sample:
+        scheduler.remove(alarm)
+    for alarm in sample:
+        scheduler.add(alarm)
+    churn_us = (time.perf_counter() - start) / (2 * len(sample)) * 1e6
+
+    # Replay one day: jump from deadline to deadline like check_alarms does
+    wakeups = fired = 0
+    start = time.perf_counter()
+    while True:
+        deadline = scheduler.next_deadline()
+        if deadline is None:
+            break
+        fired += len(scheduler.pop_due(deadline))
+        wakeups += 1
+    day_s = time.perf_counter() - start
+    assert fired == len(alarms)
+    return {"load_ms": load_s * 1e3, "churn_us": churn_us, "day_s": day_s, "wakeups": wakeups}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    for count in args.counts:
+        alarms = make_alarms(count)
+        polling = bench_polling(alarms)
+        print(f"\n{count} alarms")
+        print(f"  polling  {polling['per_tick_ms']:9.2f} ms/tick  "
+              f"{polling['day_s']:9.1f} s/day  {polling['wakeups']} wakeups")
+        for backend in ("heap", "wheel"):
+            result = bench_backend(backend, alarms)
+            print(f"  {backend:<7}  load {result['load_ms']:8.1f} ms  "
+                  f"add/remove {result['churn_us']:5.2f} us  "
+                  f"{result['day_s']:6.2f} s/day  {result['wakeups']} wakeups")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare startup time and peak RSS of the GUI and headless entry points.
+
+Each case runs in a fresh interpreter so import caches don't leak between
+runs. Run from the repository root:
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "ms": elapsed * 1e3,
+    "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "tkinter": "tkinter" in sys.modules,
+}}))
+"""
+
+CASES = {
+    # Everything src/main.py imports before the window can appear
+    "gui": "import tkinter\nimport src.core.smart_alarm_clock\nimport src.ui.modern_ui",
+    # python -m src.daemon with sound disabled
+    "daemon": "import src.daemon",
+    # python -m src.daemon with sound enabled pulls in pygame (on the audio init thread)
+    "daemon+audio": "import src.daemon\nimport src.utils.audio_manager\nimport pygame.mixer",
+}
+
+
+def run_case(body):
+    result = subprocess.run([sys.executable, "-c", PROBE.format(body=body)],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    return json.loads(result.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, body in CASES.items():
+        samples = []
+        error = None
+        for _ in range(args.runs):
+            sample, error = run_case(body)
+            if sample is None:
+                break
+            samples.append(sample)
+        if not samples:
+            print(f"{name:<13} unavailable: {error}")
+            continue
+        ms = statistics.median(s["ms"] for s in samples)
+        rss = statistics.median(s["rss_kb"] for s in samples) / 1024
+        print(f"{name:<13} {ms:8.1f} ms  {rss:6.1f} MiB peak RSS  tkinter loaded: {samples[0]['tkinter']}")
+
+
+if __name__ == "__main__":
+    main()
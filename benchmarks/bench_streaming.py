@@ -0,0 +1,90 @@
+"""Memory per playing alarm when a large WAV is decoded into the cache versus streamed.
+
+Each case runs in a fresh interpreter on SDL's dummy audio driver. It
+starts ``--alarms`` alarms on one generated file, lets them play and
+samples RSS throughout. Run from the repository root:
+
+    python benchmarks/bench_streaming.py --minutes 10 --alarms 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+from src.utils import synth
+from src.utils.streaming import CHUNK_SECONDS
+
+PROBE = """
+import json, os, time
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+from src.data.settings import Settings
+from src.utils.audio_manager import AudioManager
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+settings = Settings()
+settings.set("stream_threshold_mb", {threshold})
+audio = AudioManager(settings)
+audio.wait_ready(timeout=10)
+baseline = peak = rss()
+start = time.perf_counter()
+handles = [audio.play_alarm({path!r}) for _ in range({alarms})]
+started = time.perf_counter() - start
+deadline = time.monotonic() + {seconds}
+while time.monotonic() < deadline:
+    time.sleep(0.05)
+    peak = max(peak, rss())
+print(json.dumps({{
+    "start_ms": started * 1e3,
+    "peak_delta": peak - baseline,
+    "playing": sum(h is not None and h.playing for h in handles),
+    "streamed": sum(h is not None and h.stream is not None for h in handles),
+}}))
+audio.stop_alarm()
+audio.quit()
+"""
+
+
+def run_case(path, threshold, alarms, seconds):
+    body = PROBE.format(path=path, threshold=threshold, alarms=alarms, seconds=seconds)
+    result = subprocess.run([sys.executable, "-c", body], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    return json.loads(result.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=10.0, help="length of the generated WAV")
+    parser.add_argument("--alarms", type=int, default=4, help="alarms playing the file at once")
+    parser.add_argument("--seconds", type=float, default=5.0, help="how long to let them play")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.wav")
+        # pygame's default mixer format, so streaming can use the samples as they are
+        synth.write_wav(path, synth.tone(440.0, args.minutes * 60), channels=2)
+        size_mib = os.path.getsize(path) / 2**20
+        print(f"{args.minutes:g} min stereo WAV, {size_mib:.0f} MiB, {args.alarms} alarms")
+        print(f"expected stream ceiling: {3 * 44100 * 4 * CHUNK_SECONDS / 2**20:.2f} MiB per alarm")
+        for name, threshold in (("cached", size_mib * 2), ("streamed", 0)):
+            sample, error = run_case(path, threshold, args.alarms, args.seconds)
+            if sample is None:
+                print(f"{name:<9} unavailable: {error}")
+                continue
+            delta = sample["peak_delta"] / 2**20
+            print(f"{name:<9} start {sample['start_ms']:8.1f} ms  peak RSS +{delta:7.1f} MiB "
+                  f"({delta / args.alarms:6.2f} MiB per alarm)  "
+                  f"playing {sample['playing']}/{args.alarms}, streamed {sample['streamed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Tone synthesis time: the old per-sample loop versus src.utils.synth.
+
+Also times rendering the built-in default alarm into an empty cache and
+looking it up again. Run from the repository root:
+
+    python benchmarks/bench_synth.py --seconds 30
+"""
+import argparse
+import math
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.utils import synth
+
+
+def per_sample_beep(filename, duration, frequency, amplitude=0.5, sample_rate=44100, channels=1):
+    """create_beep_sound as it was: math.sin and struct.pack once per sample"""
+    audio_data = []
+    for i in range(int(duration * sample_rate)):
+        t = float(i) / sample_rate
+        packed_value = struct.pack('h', int(amplitude * math.sin(2.0 * math.pi * frequency * t) * 32767.0))
+        audio_data.append(packed_value * channels)
+    with wave.open(filename, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(b''.join(audio_data))
+
+
+def timed(run, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"numpy: {'yes' if synth.import_numpy() is not None else 'no (array fallback)'}")
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "out.wav")
+        cache = os.path.join(tmp, "cache")
+        seconds = args.seconds
+
+        def cold_default():
+            for name in os.listdir(cache) if os.path.isdir(cache) else ():
+                os.remove(os.path.join(cache, name))
+            synth.cached_pattern(synth.DEFAULT_ALARM, cache)
+
+        cases = {
+            f"per-sample loop, {seconds:g} s stereo tone":
+                lambda: per_sample_beep(out, seconds, 440.0, channels=2),
+            f"synth.tone, {seconds:g} s stereo":
+                lambda: synth.write_wav(out, synth.tone(440.0, seconds), channels=2),
+            f"synth.tone, {seconds:g} s stereo at 441.5 Hz":
+                lambda: synth.write_wav(out, synth.tone(441.5, seconds), channels=2),
+            f"synth.chirp 200-2000 Hz, {seconds:g} s stereo":
+                lambda: synth.write_wav(out, synth.chirp(200.0, 2000.0, seconds), channels=2),
+            "default alarm, empty cache": cold_default,
+            "default alarm, cached": lambda: synth.cached_pattern(synth.DEFAULT_ALARM, cache),
+        }
+        for name, run in cases.items():
+            print(f"{name:<52} {timed(run, args.runs):9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
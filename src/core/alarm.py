@@ -0,0 +1,63 @@
+import sys
+from src.core.recurrence import Recurrence
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_time(time_str):
+    """Convert an "HH:MM" string to minutes since midnight"""
+    hour, minute = time_str.split(":")
+    hour, minute = int(hour), int(minute)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid alarm time: {time_str}")
+    return hour * 60 + minute
+
+
+def format_time(minute_of_day):
+    """Convert minutes since midnight back to an "HH:MM" string"""
+    return f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}"
+
+
+class Alarm:
+    """A single alarm with its time pre-parsed to a minute of the day.
+
+    Uses ``__slots__`` so large alarm sets carry no per-instance dict, and
+    interns the sound path since most alarms share a handful of sounds.
+    ``rule`` is a Recurrence for repeating alarms and None for one-shots.
+    """
+
+    __slots__ = ("id", "minute", "sound_path", "note", "snooze_count", "rule")
+
+    def __init__(self, id, minute, sound_path, note="", snooze_count=0, rule=None):
+        self.id = id
+        self.minute = minute
+        self.sound_path = sys.intern(sound_path) if sound_path else sound_path
+        self.note = note or ""
+        self.snooze_count = snooze_count or 0
+        self.rule = rule
+
+    @classmethod
+    def from_row(cls, row):
+        """Build an alarm from an (id, time, sound_path, note, snooze_count,
+        repeat_rule, repeat_value, repeat_anchor) row"""
+        alarm_id, time_str, sound_path, note, snooze_count, kind, value, anchor = row
+        return cls(alarm_id, parse_time(time_str), sound_path, note, snooze_count,
+                   Recurrence.from_columns(kind, value, anchor))
+
+    @property
+    def recurring(self):
+        """Whether the alarm repeats instead of firing once"""
+        return self.rule is not None
+
+    @property
+    def time(self):
+        """The alarm time as an "HH:MM" string"""
+        return format_time(self.minute)
+
+    def describe(self):
+        """Text shown for the alarm in the alarm list"""
+        text = f"{self.time} - {self.note}" if self.note else self.time
+        return f"{text} ({self.rule.describe()})" if self.rule else text
+
+    def __repr__(self):
+        return f"Alarm(id={self.id!r}, time={self.time!r}, note={self.note!r}, rule={self.rule!r})"
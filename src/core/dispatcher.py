@@ -0,0 +1,75 @@
+import collections
+import queue
+import time
+
+# Core events delivered to the main thread
+PREPARE = "prepare"
+FIRE = "fire"
+SNOOZE = "snooze"
+STOP = "stop"
+ALARMS_CHANGED = "alarms_changed"
+
+
+class UIDispatcher:
+    """Hands core events from worker threads to the Tk main thread.
+
+    Workers call ``post``, which only touches a ``queue.SimpleQueue``. A
+    single ``root.after`` pump on the main thread drains the queue and runs
+    the subscribed handlers there, so no widget is ever created or updated
+    off the main thread. The time each event spent queued is recorded and
+    summarised by ``latency_stats``.
+    """
+
+    def __init__(self, root, interval_ms=20, history=1000):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._queue = queue.SimpleQueue()
+        self._handlers = collections.defaultdict(list)
+        self._latencies_ns = collections.deque(maxlen=history)
+        self._after_id = None
+
+    def subscribe(self, event, handler):
+        """Run handler(*args) on the main thread whenever event is posted"""
+        self._handlers[event].append(handler)
+
+    def post(self, event, *args):
+        """Queue an event from any thread"""
+        self._queue.put((event, args, time.perf_counter_ns()))
+
+    def start(self):
+        """Start pumping the queue on the Tk event loop"""
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._pump)
+
+    def stop(self):
+        """Stop pumping; events still queued are dropped"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _pump(self):
+        """Deliver everything queued so far, then re-arm"""
+        while True:
+            try:
+                event, args, posted_ns = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._latencies_ns.append(time.perf_counter_ns() - posted_ns)
+            for handler in self._handlers.get(event, ()):
+                try:
+                    handler(*args)
+                except Exception as e:
+                    print(f"Error handling {event} event: {e}")
+        self._after_id = self.root.after(self.interval_ms, self._pump)
+
+    def latency_stats(self):
+        """Summarise recent queue-to-handler latency in milliseconds"""
+        samples = sorted(self._latencies_ns)
+        if not samples:
+            return {"count": 0}
+        return {
+            "count": len(samples),
+            "p50_ms": samples[len(samples) // 2] / 1e6,
+            "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1e6,
+            "max_ms": samples[-1] / 1e6,
+        }
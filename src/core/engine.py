@@ -0,0 +1,164 @@
+import abc
+import datetime
+import math
+import time
+
+from src.core.prepare import PrepareQueue
+from src.core.scheduler import create_scheduler, next_fire_time
+from src.core.window import AlarmWindow
+from src.utils.sound_cache import PRELOAD_LEAD, PRELOAD_INTERVAL
+
+
+class AlarmEngine(abc.ABC):
+    """Headless core shared by the GUI and the daemon.
+
+    Owns the schedule and the thread that runs it. ``run`` sleeps until the
+    next deadline, window refill, preload pass or prepare instant. It
+    refills the alarm window, preloads the sounds of alarms firing soon and
+    prepares each one ``prepare_lead_seconds`` ahead. Then it hands due
+    alarms to ``fire_due`` with their fire traces begun, except for alarms
+    whose deadline had already passed when they were scheduled. Subclasses supply
+    ``fire_due`` and may extend ``prepare_due``; ``retire`` and
+    ``skip_occurrence`` keep the schedule right once an alarm stops or
+    can't ring.
+
+    ``audio`` may be None, in which case nothing is preloaded or prepared.
+    ``latency`` is the LatencyRecorder the fires are traced on.
+    """
+
+    def __init__(self, db, settings, latency, audio=None, scheduler_backend="heap"):
+        self.db = db
+        self.settings = settings
+        self.latency = latency
+        self.audio = audio
+
+        # In-memory alarms keyed by id: the upcoming window plus anything ringing
+        self.alarms = {}
+        # "heap" suits everyday alarm counts; "wheel" scales to very large sets
+        self.scheduler = create_scheduler(scheduler_backend)
+        # Guards self.alarms together with the schedule; shared with the loop
+        self.alarms_lock = self.scheduler.condition
+        # Filled page by page on the loop thread, so startup reads nothing
+        self.window = AlarmWindow(self.db, self.scheduler, self.alarms)
+        # Epoch time of the last preload pass
+        self._last_preload = -math.inf
+        # Sounds are loaded (and dialogs built) this long before each deadline
+        self.preparer = PrepareQueue(self.scheduler, self.settings.get("prepare_lead_seconds"))
+        self.settings.subscribe("prepare_lead_seconds", lambda key, value: setattr(self.preparer, "lead", value))
+        self._calls = []
+        # When the loop last popped due alarms; anything due before then was
+        # scheduled after its deadline, or it would have been popped already
+        self._checked_at = time.time()
+        self.running = True
+
+    def run(self):
+        """Handle the schedule until ``stop`` is called"""
+        # The window walk reads committed rows only; let it see writes queued
+        # before the loop started
+        self.db.flush()
+        while True:
+            with self.alarms_lock:
+                if not self.running:
+                    break
+                calls, self._calls = self._calls, []
+                self.window.refill()
+                now = time.time()
+                due = self.scheduler.pop_due(now, with_deadlines=True)
+                checked_at, self._checked_at = self._checked_at, now
+                preload = self.preload_pass()
+                prepare = self.preparer.pop_ready(now)
+                if not due and not calls and not preload and not prepare:
+                    # Woken by the deadline, the next refill, preload pass or prepare
+                    # instant, or any add/remove/snooze/stop
+                    self.scheduler.wait(until=min(self.window.refill_at, self.next_preload(),
+                                                  self.preparer.next_at))
+                    continue
+            # Decoding happens on the audio preload thread, never under the lock
+            for sound_path in preload:
+                self.audio.preload(sound_path)
+            for function, args in calls:
+                function(*args)
+            if prepare:
+                self.prepare_due(prepare)
+            if due:
+                for fire_at, alarm in due:
+                    # One set for the current minute, or loaded at startup, would
+                    # count seconds it was never waiting for
+                    if fire_at >= checked_at:
+                        self.latency.begin(alarm.id, fire_at)
+                self.fire_due(due)
+
+    def stop(self):
+        """Ask the loop to exit; safe from any thread"""
+        with self.alarms_lock:
+            self.running = False
+            self.scheduler.wake()
+
+    def call_soon(self, function, *args):
+        """Run ``function(*args)`` on the loop thread, e.g. from a timer"""
+        with self.alarms_lock:
+            self._calls.append((function, args))
+            self.scheduler.wake()
+
+    @abc.abstractmethod
+    def fire_due(self, due):
+        """Ring a batch of ``(fire_at, alarm)`` pairs that just came due (loop thread)"""
+
+    def prepare_due(self, prepare):
+        """Ready ``(fire_at, alarm)`` pairs firing in ``prepare_lead_seconds`` (loop thread)"""
+        for _, alarm in prepare:
+            # Cheap if the preload pass already loaded it
+            self.audio.preload(alarm.sound_path)
+
+    def preload_pass(self):
+        """Sounds of alarms firing soon, once every PRELOAD_INTERVAL (call with the lock held).
+
+        The same alarms are queued for their prepare stage.
+        """
+        now = time.time()
+        if now < self.next_preload():
+            return set()
+        self._last_preload = now
+        upcoming = self.scheduler.upcoming(now + PRELOAD_LEAD, with_deadlines=True)
+        self.preparer.track(upcoming, now)
+        return {alarm.sound_path for _, alarm in upcoming if alarm.sound_path}
+
+    def next_preload(self):
+        """When the next preload pass is due (call with the lock held).
+
+        That is PRELOAD_LEAD before the earliest deadline, and no sooner than
+        PRELOAD_INTERVAL after the last pass. Never, with nothing scheduled
+        or no audio, so an idle clock doesn't wake up for it.
+        """
+        deadline = self.scheduler.next_deadline()
+        if deadline is None or self.audio is None:
+            return math.inf
+        return max(self._last_preload + PRELOAD_INTERVAL, deadline - PRELOAD_LEAD)
+
+    def request_preload(self):
+        """Let the next pass run without waiting out PRELOAD_INTERVAL (call with the lock held)"""
+        self._last_preload = -math.inf
+
+    def schedule_next_occurrence(self, alarm):
+        """Schedule an alarm's first occurrence after the current minute (call with the lock held)"""
+        next_minute = datetime.datetime.now() + datetime.timedelta(minutes=1)
+        self.window.keep(alarm, next_fire_time(alarm.minute, next_minute, alarm.rule))
+
+    def skip_occurrence(self, alarm):
+        """Drop a fire of an alarm that is still ringing from before and catch its next one"""
+        self.latency.discard(alarm.id)
+        with self.alarms_lock:
+            self.schedule_next_occurrence(alarm)
+
+    def retire(self, alarm):
+        """After an alarm is stopped: advance a recurring one, deactivate a one-shot"""
+        with self.alarms_lock:
+            # Deleted while it rang; scheduling it again would bring it back
+            if alarm.id not in self.alarms:
+                return
+            if alarm.recurring:
+                self.schedule_next_occurrence(alarm)
+                return
+        self.db.deactivate_alarm(alarm)
+        with self.alarms_lock:
+            self.window.release(alarm)
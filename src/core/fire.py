@@ -0,0 +1,27 @@
+import time
+
+RINGING = "ringing"
+SNOOZED = "snoozed"
+STOPPED = "stopped"
+
+
+class ActiveFire:
+    """State of one alarm that is currently going off.
+
+    Kept in SmartAlarmClock.active_fires keyed by alarm id, so any number
+    of alarms can ring at once and snooze/stop act on exactly one of them.
+    """
+
+    __slots__ = ("alarm", "dialog", "channel", "state", "started_at")
+
+    def __init__(self, alarm):
+        self.alarm = alarm
+        self.dialog = None
+        # PlaybackHandle of the alarm's sound, None until it plays
+        self.channel = None
+        self.state = RINGING
+        self.started_at = time.time()
+
+    @property
+    def ringing(self):
+        return self.state == RINGING
@@ -0,0 +1,289 @@
+"""Fire latency: how late each stage of an alarm fire happens.
+
+Every fire is traced from its scheduled deadline through the stages in
+STAGES, timed with ``time.perf_counter_ns``. Each stage keeps an
+in-memory log-linear histogram of its lateness, which is dumped as JSON
+on exit and summarised here:
+
+    python -m src.core.latency
+    python -m src.core.latency src/data/fire_latency.json --slo-ms 250
+
+The report exits with status 1 when the p99 lateness of the SLO stage
+(audio started, by default) is over the SLO, so it can gate a release.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+
+from src.data.database import DB_PATH
+
+# Stages of a fire, in the order they normally happen
+WAKE = "wake"          # the scheduler thread found the alarm due
+DISPATCH = "dispatch"  # the thread that fires it started handling it
+DIALOG = "dialog"      # its dialog was mapped on screen
+AUDIO = "audio"        # its sound was started on a mixer channel
+STAGES = (WAKE, DISPATCH, DIALOG, AUDIO)
+
+# Where the GUI and the daemon keep their histograms between runs
+LATENCY_PATH = os.path.join(os.path.dirname(DB_PATH), "fire_latency.json")
+DAEMON_LATENCY_PATH = os.path.join(os.path.dirname(DB_PATH), "fire_latency_daemon.json")
+PERCENTILES = (50, 90, 99)
+# p99 lateness allowed at the SLO stage unless the fire_latency_slo_ms setting says otherwise
+DEFAULT_SLO_MS = 250.0
+
+# Each power of two is split into this many linear buckets, so a reported
+# percentile is within 1/16 (about 6%) of the true value
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+logger = logging.getLogger("alarmclock")
+
+
+def _bucket(value):
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+
+def _bucket_high(index):
+    """Largest value that falls into bucket ``index``"""
+    if index < SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class Histogram:
+    """Log-linear histogram of non-negative nanosecond durations.
+
+    Takes a few hundred counters at most however many samples it holds;
+    count, total, min and max are exact.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, value):
+        value = max(int(value), 0)
+        index = _bucket(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, p):
+        """Value at or below which ``p`` percent of samples fall; None if empty"""
+        if not self.count:
+            return None
+        rank = max(math.ceil(self.count * p / 100), 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(_bucket_high(index), self.max)
+        return self.max
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_json(self):
+        return {
+            "count": self.count,
+            "total_ns": self.total,
+            "min_ns": self.min,
+            "max_ns": self.max,
+            "buckets": {str(index): count for index, count in sorted(self.counts.items())},
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in data["buckets"].items()}
+        histogram.count = data["count"]
+        histogram.total = data["total_ns"]
+        histogram.min = data["min_ns"]
+        histogram.max = data["max_ns"]
+        return histogram
+
+
+class LatencyRecorder:
+    """Traces alarm fires stage by stage and keeps a histogram per stage.
+
+    ``begin`` starts a trace at the WAKE stage from the alarm's epoch
+    deadline, carried over to the perf_counter_ns clock; ``mark`` records
+    how long after the deadline a later stage happened. A trace ends once
+    every stage in ``stages`` is marked, or on ``discard``. Marks for
+    alarms without a trace and repeated marks are ignored.
+
+    Whenever the SLO stage is marked, its p99 is compared with ``slo_ms``
+    and a warning is logged when it goes over (and a note when it's back).
+    Safe to use from any thread.
+    """
+
+    def __init__(self, stages=STAGES, slo_ms=DEFAULT_SLO_MS, slo_stage=None):
+        self.stages = tuple(stages)
+        self.slo_ms = slo_ms
+        self.slo_stage = slo_stage or self.stages[-1]
+        self.histograms = {stage: Histogram() for stage in self.stages}
+        self._traces = {}  # alarm id -> (deadline_ns, stages marked so far)
+        self._lock = threading.Lock()
+        self._over_slo = False
+
+    def begin(self, alarm_id, fire_at):
+        """Start tracing a fire that was due at epoch time ``fire_at``"""
+        now_ns = time.perf_counter_ns()
+        deadline_ns = now_ns - int((time.time() - fire_at) * 1e9)
+        with self._lock:
+            self._traces[alarm_id] = (deadline_ns, set())
+        self.mark(alarm_id, WAKE, now_ns)
+
+    def mark(self, alarm_id, stage, now_ns=None):
+        """Record that ``stage`` of the alarm's current fire happened now"""
+        if now_ns is None:
+            now_ns = time.perf_counter_ns()
+        with self._lock:
+            trace = self._traces.get(alarm_id)
+            if trace is None or stage in trace[1] or stage not in self.histograms:
+                return
+            deadline_ns, marked = trace
+            marked.add(stage)
+            self.histograms[stage].record(now_ns - deadline_ns)
+            if len(marked) == len(self.stages):
+                del self._traces[alarm_id]
+            if stage == self.slo_stage:
+                self._check_slo()
+
+    def discard(self, alarm_id):
+        """Stop tracing an alarm's fire, e.g. when it is dismissed before all stages happen"""
+        with self._lock:
+            self._traces.pop(alarm_id, None)
+
+    def _check_slo(self):
+        p99 = self.histograms[self.slo_stage].percentile(99) / 1e6
+        over = p99 > self.slo_ms
+        if over and not self._over_slo:
+            logger.warning("Fire latency p99 %.1f ms at %s is over the %.0f ms SLO",
+                           p99, self.slo_stage, self.slo_ms)
+        elif self._over_slo and not over:
+            logger.info("Fire latency p99 %.1f ms at %s is back within the %.0f ms SLO",
+                        p99, self.slo_stage, self.slo_ms)
+        self._over_slo = over
+
+    def report(self):
+        """Per-stage count, mean, percentiles and max in milliseconds"""
+        with self._lock:
+            rows = {}
+            for stage, histogram in self.histograms.items():
+                row = {"count": histogram.count}
+                if histogram.count:
+                    row["mean_ms"] = histogram.total / histogram.count / 1e6
+                    for p in PERCENTILES:
+                        row[f"p{p}_ms"] = histogram.percentile(p) / 1e6
+                    row["max_ms"] = histogram.max / 1e6
+                rows[stage] = row
+            return rows
+
+    def within_slo(self):
+        """False if the SLO stage's p99 is over ``slo_ms``; True with no samples yet"""
+        with self._lock:
+            p99 = self.histograms[self.slo_stage].percentile(99)
+        return p99 is None or p99 / 1e6 <= self.slo_ms
+
+    def format_report(self):
+        lines = [f"{'stage':<10}{'count':>8}{'mean':>10}"
+                 + "".join(f"{f'p{p}':>10}" for p in PERCENTILES) + f"{'max':>10}   (ms after deadline)"]
+        for stage, row in self.report().items():
+            if not row["count"]:
+                lines.append(f"{stage:<10}{0:>8}")
+                continue
+            lines.append(f"{stage:<10}{row['count']:>8}{row['mean_ms']:>10.1f}"
+                         + "".join(f"{row[f'p{p}_ms']:>10.1f}" for p in PERCENTILES)
+                         + f"{row['max_ms']:>10.1f}")
+        verdict = "ok" if self.within_slo() else "VIOLATED"
+        lines.append(f"SLO: p99 at {self.slo_stage} <= {self.slo_ms:g} ms: {verdict}")
+        return "\n".join(lines)
+
+    def to_json(self):
+        with self._lock:
+            return {
+                "slo_ms": self.slo_ms,
+                "slo_stage": self.slo_stage,
+                "stages": {stage: h.to_json() for stage, h in self.histograms.items()},
+            }
+
+    def dump(self, path=LATENCY_PATH):
+        """Write the histograms to ``path`` as JSON, replacing the file atomically"""
+        partial = path + ".part"
+        with open(partial, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f)
+        os.replace(partial, path)
+
+    def load(self, path=LATENCY_PATH):
+        """Add the histograms dumped at ``path`` to this recorder's; False if there are none"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            loaded = {stage: Histogram.from_json(h) for stage, h in data["stages"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        with self._lock:
+            for stage, histogram in loaded.items():
+                if stage in self.histograms:
+                    self.histograms[stage].merge(histogram)
+        return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report alarm fire latency percentiles")
+    parser.add_argument("paths", nargs="*", default=[LATENCY_PATH], metavar="FILE",
+                        help="latency dumps to merge (default: src/data/fire_latency.json)")
+    parser.add_argument("--slo-ms", type=float, help="p99 SLO to check (default: the dump's)")
+    parser.add_argument("--stage", choices=STAGES, help="stage the SLO applies to (default: the dump's)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    dumps = []
+    for path in args.paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                dumps.append(json.load(f))
+        except (OSError, ValueError) as e:
+            parser.exit(2, f"{parser.prog}: error: can't read {path}: {e}\n")
+    first = dumps[0]
+    stages = [stage for stage in STAGES if any(stage in d.get("stages", {}) for d in dumps)] or STAGES
+    slo_stage = args.stage or first.get("slo_stage") or stages[-1]
+    if slo_stage not in stages:
+        parser.error(f"no {slo_stage} samples in {', '.join(args.paths)}")
+    recorder = LatencyRecorder(stages, slo_stage=slo_stage,
+                               slo_ms=args.slo_ms if args.slo_ms is not None else first.get("slo_ms", DEFAULT_SLO_MS))
+    for path in args.paths:
+        recorder.load(path)
+
+    if args.json:
+        print(json.dumps({"slo_ms": recorder.slo_ms, "slo_stage": recorder.slo_stage,
+                          "within_slo": recorder.within_slo(), "stages": recorder.report()}, indent=2))
+    else:
+        print(recorder.format_report())
+    sys.exit(0 if recorder.within_slo() else 1)
+
+
+if __name__ == "__main__":
+    main()
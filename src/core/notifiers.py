@@ -0,0 +1,74 @@
+import logging
+import os
+import shlex
+import subprocess
+
+logger = logging.getLogger("alarmclock")
+
+
+class Notifier:
+    """Receives alarm events when running without a GUI"""
+
+    def alarm_fired(self, alarm):
+        pass
+
+    def alarm_stopped(self, alarm):
+        pass
+
+
+class LogNotifier(Notifier):
+    """Writes alarm events to the ``alarmclock`` logger"""
+
+    def alarm_fired(self, alarm):
+        logger.info("Alarm %s fired at %s: %s", alarm.id, alarm.time, alarm.note or "Time to wake up!")
+
+    def alarm_stopped(self, alarm):
+        logger.info("Alarm %s stopped", alarm.id)
+
+
+class StdoutNotifier(Notifier):
+    """Prints one line per alarm event"""
+
+    def alarm_fired(self, alarm):
+        print(f"ALARM {alarm.id} {alarm.time} {alarm.note or 'Time to wake up!'}", flush=True)
+
+    def alarm_stopped(self, alarm):
+        print(f"STOPPED {alarm.id}", flush=True)
+
+
+class CommandNotifier(Notifier):
+    """Runs a shell-style command for each fired alarm without waiting for it.
+
+    Alarm details are passed in the environment as ALARM_ID, ALARM_TIME,
+    ALARM_NOTE and ALARM_SOUND rather than interpolated into the command.
+    """
+
+    def __init__(self, command):
+        self.args = shlex.split(command)
+
+    def alarm_fired(self, alarm):
+        env = dict(os.environ,
+                   ALARM_ID=str(alarm.id),
+                   ALARM_TIME=alarm.time,
+                   ALARM_NOTE=alarm.note or "",
+                   ALARM_SOUND=alarm.sound_path or "")
+        try:
+            subprocess.Popen(self.args, env=env)
+        except OSError as e:
+            logger.warning("Could not run alarm command: %s", e)
+
+
+NOTIFIERS = ("log", "stdout", "command")
+
+
+def create_notifier(name, command=None):
+    """Create a notifier by name: "log", "stdout" or "command" """
+    if name == "log":
+        return LogNotifier()
+    if name == "stdout":
+        return StdoutNotifier()
+    if name == "command":
+        if not command:
+            raise ValueError("The command notifier needs a command")
+        return CommandNotifier(command)
+    raise ValueError(f"Unknown notifier: {name}")
@@ -0,0 +1,59 @@
+import heapq
+import itertools
+import math
+
+# Seconds before its deadline an alarm's sound and dialog are readied, unless
+# the prepare_lead_seconds setting says otherwise
+DEFAULT_PREPARE_LEAD = 30.0
+
+
+class PrepareQueue:
+    """Hands out each scheduled occurrence once, ``lead`` seconds before it fires.
+
+    ``track`` is fed the ``(fire_at, alarm)`` pairs of the preload pass.
+    That pass looks PRELOAD_LEAD seconds ahead, so as long as ``lead`` is
+    shorter every occurrence is queued before its prepare instant. A
+    deadline already inside the lead is due right away. ``pop_ready``
+    returns the occurrences whose instant has come and that are still
+    scheduled for the same deadline; a snoozed, moved or removed alarm is
+    dropped there. ``next_at`` is the instant the caller should wake up
+    for. A lead of 0 turns the stage off. All methods must be called with
+    the scheduler's condition held.
+    """
+
+    def __init__(self, scheduler, lead=DEFAULT_PREPARE_LEAD):
+        self.scheduler = scheduler
+        self.lead = lead
+        self._heap = []
+        # (alarm id, fire_at) -> alarm for every occurrence queued or handed out,
+        # until it is past and gone from the schedule
+        self._seen = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    @property
+    def next_at(self):
+        return self._heap[0][0] if self._heap else math.inf
+
+    def track(self, upcoming, now):
+        """Queue the occurrences in ``upcoming`` that haven't been queued yet"""
+        self._seen = {key: alarm for key, alarm in self._seen.items()
+                      if key[1] >= now or self.scheduler.deadline(alarm) == key[1]}
+        if not self.lead:
+            return
+        for fire_at, alarm in upcoming:
+            key = (alarm.id, fire_at)
+            if key not in self._seen:
+                self._seen[key] = alarm
+                heapq.heappush(self._heap, (fire_at - self.lead, next(self._counter), fire_at, alarm))
+
+    def pop_ready(self, now):
+        """``(fire_at, alarm)`` pairs whose prepare instant is at or before ``now``"""
+        ready = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, fire_at, alarm = heapq.heappop(self._heap)
+            if self.scheduler.deadline(alarm) == fire_at:
+                ready.append((fire_at, alarm))
+        return ready
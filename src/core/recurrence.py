@@ -0,0 +1,85 @@
+import calendar
+import datetime
+
+WEEKDAYS = "weekdays"
+INTERVAL = "interval"
+MONTHLY = "monthly"
+
+# Monday..Friday as a bitmask, Monday being bit 0 like date.weekday()
+WORKDAY_MASK = 0b0011111
+DAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+class Recurrence:
+    """A repeat rule that yields the next occurrence date on demand.
+
+    Only the next date is ever computed, so cost does not depend on how
+    far the series extends:
+
+    - ``weekdays``: ``value`` is a weekday bitmask (Monday = bit 0)
+    - ``interval``: every ``value`` days counted from ``anchor``
+    - ``monthly``: on day ``value`` of each month; months without that day
+      are skipped
+
+    No kind ever has an occurrence before ``anchor``.
+    """
+
+    __slots__ = ("kind", "value", "anchor")
+
+    def __init__(self, kind, value, anchor=None):
+        if kind not in (WEEKDAYS, INTERVAL, MONTHLY):
+            raise ValueError(f"Unknown recurrence: {kind}")
+        if kind == WEEKDAYS and not 0 < value < 128:
+            raise ValueError("Weekday mask must select at least one day")
+        if kind == INTERVAL and value < 1:
+            raise ValueError("Interval must be at least one day")
+        if kind == MONTHLY and not 1 <= value <= 31:
+            raise ValueError("Day of month must be between 1 and 31")
+        self.kind = kind
+        self.value = value
+        self.anchor = anchor or datetime.date.today()
+
+    @classmethod
+    def from_columns(cls, kind, value, anchor):
+        """Build a rule from the repeat_* columns, or None for a one-shot alarm"""
+        if not kind:
+            return None
+        anchor = datetime.date.fromisoformat(anchor) if anchor else None
+        return cls(kind, value, anchor)
+
+    def to_columns(self):
+        """Return the (repeat_rule, repeat_value, repeat_anchor) column values"""
+        return self.kind, self.value, self.anchor.isoformat()
+
+    def next_date(self, start):
+        """Return the first occurrence date on or after ``start`` (and ``anchor``)"""
+        start = max(start, self.anchor)
+        if self.kind == WEEKDAYS:
+            for offset in range(7):
+                day = start + datetime.timedelta(days=offset)
+                if self.value & (1 << day.weekday()):
+                    return day
+        if self.kind == INTERVAL:
+            offset = (self.anchor - start).days % self.value
+            return start + datetime.timedelta(days=offset)
+        # MONTHLY: at most two months in a row can lack days 29-31
+        year, month = start.year, start.month
+        while True:
+            if self.value <= calendar.monthrange(year, month)[1]:
+                day = datetime.date(year, month, self.value)
+                if day >= start:
+                    return day
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    def describe(self):
+        """Short human-readable form for the alarm list"""
+        if self.kind == WEEKDAYS:
+            if self.value == WORKDAY_MASK:
+                return "weekdays"
+            return ",".join(name for bit, name in enumerate(DAY_NAMES) if self.value & (1 << bit))
+        if self.kind == INTERVAL:
+            return "daily" if self.value == 1 else f"every {self.value} days"
+        return f"monthly on day {self.value}"
+
+    def __repr__(self):
+        return f"Recurrence({self.kind!r}, {self.value!r}, {self.anchor!r})"
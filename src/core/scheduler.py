@@ -0,0 +1,185 @@
+import heapq
+import itertools
+import threading
+import datetime
+
+
+def next_fire_time(minute_of_day, now=None, rule=None):
+    """Return the epoch timestamp of the next occurrence of a minute of the day.
+
+    An alarm whose minute is the current minute is still due now, matching
+    the minute-level comparison the old polling loop used. With a recurrence
+    rule only the next matching date is computed, never the whole series.
+    """
+    now = now or datetime.datetime.now()
+    alarm_time = datetime.time(minute_of_day // 60, minute_of_day % 60)
+    day = rule.next_date(now.date()) if rule else now.date()
+    fire_at = datetime.datetime.combine(day, alarm_time)
+    if fire_at < now.replace(second=0, microsecond=0):
+        day += datetime.timedelta(days=1)
+        day = rule.next_date(day) if rule else day
+        fire_at = datetime.datetime.combine(day, alarm_time)
+    return fire_at.timestamp()
+
+
+class BaseScheduler:
+    """Shared waiting and locking for the scheduler backends.
+
+    Every mutation notifies ``condition`` so a thread blocked in ``wait``
+    re-arms immediately. The condition's lock is reentrant and may be held
+    by callers to guard state that must change together with the schedule.
+
+    Subclasses implement ``add``, ``remove``, ``next_deadline``, ``pop_due``,
+    ``clear`` and ``__len__``/``__contains__``, and keep ``_entries``
+    mapping alarm id to an entry list starting ``[fire_at, _, alarm, ...]``.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition(threading.RLock())
+
+    def reschedule(self, alarm, fire_at=None):
+        """Move an alarm to a new fire instant"""
+        self.add(alarm, fire_at)
+
+    def load(self, alarms):
+        """Replace the schedule with the next occurrence of every alarm"""
+        with self.condition:
+            self.clear()
+            for alarm in alarms:
+                self.add(alarm)
+
+    def upcoming(self, until, with_deadlines=False):
+        """Scheduled alarms that fire at or before ``until``, in no particular order.
+
+        With ``with_deadlines`` the items are ``(fire_at, alarm)`` pairs.
+        """
+        with self.condition:
+            if with_deadlines:
+                return [(entry[0], entry[2]) for entry in self._entries.values() if entry[0] <= until]
+            return [entry[2] for entry in self._entries.values() if entry[0] <= until]
+
+    def deadline(self, alarm):
+        """The instant an alarm is scheduled to fire at, or None if it isn't scheduled"""
+        with self.condition:
+            entry = self._entries.get(alarm.id)
+            return entry[0] if entry is not None else None
+
+    def wait(self, until=None):
+        """Block until the earliest deadline or until the schedule changes.
+
+        ``until`` caps the sleep at an extra epoch timestamp. With nothing
+        scheduled and no cap this sleeps without a timeout, so an idle clock
+        never wakes up until an alarm is added or ``wake`` is called.
+        """
+        with self.condition:
+            deadline = self.next_deadline()
+            if until is not None:
+                deadline = until if deadline is None else min(deadline, until)
+            if deadline is None:
+                self.condition.wait()
+                return
+            timeout = deadline - datetime.datetime.now().timestamp()
+            if timeout > 0:
+                self.condition.wait(timeout)
+
+    def wake(self):
+        """Interrupt a pending wait, e.g. on shutdown"""
+        with self.condition:
+            self.condition.notify_all()
+
+
+class HeapScheduler(BaseScheduler):
+    """Min-heap of alarms keyed by their next fire instant.
+
+    Entries are keyed by alarm id. Removal is lazy: cancelled entries are
+    flagged and discarded when they reach the top of the heap, so add,
+    remove and reschedule all stay O(log n) without re-heapifying. Best suited to small and medium sets.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, alarm):
+        return alarm.id in self._entries
+
+    def add(self, alarm, fire_at=None):
+        """Schedule an alarm, replacing any existing entry for it"""
+        if fire_at is None:
+            fire_at = next_fire_time(alarm.minute, rule=alarm.rule)
+        with self.condition:
+            self.remove(alarm)
+            entry = [fire_at, next(self._counter), alarm]
+            self._entries[alarm.id] = entry
+            heapq.heappush(self._heap, entry)
+            self.condition.notify_all()
+
+    def load(self, alarms):
+        """Replace the schedule in one O(n) heapify instead of n pushes"""
+        now = datetime.datetime.now()
+        with self.condition:
+            self._heap = [[next_fire_time(alarm.minute, now, alarm.rule), next(self._counter), alarm]
+                          for alarm in alarms]
+            self._entries = {entry[2].id: entry for entry in self._heap}
+            heapq.heapify(self._heap)
+            self.condition.notify_all()
+
+    def remove(self, alarm):
+        """Cancel an alarm if it is scheduled"""
+        with self.condition:
+            entry = self._entries.pop(alarm.id, None)
+            if entry is not None:
+                entry[2] = None
+                self.condition.notify_all()
+
+    def _discard_cancelled(self):
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+
+    def next_deadline(self):
+        """Return the earliest fire instant, or None if nothing is scheduled"""
+        with self.condition:
+            self._discard_cancelled()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None, with_deadlines=False):
+        """Remove and return every alarm whose deadline has passed.
+
+        With ``with_deadlines`` the items are ``(fire_at, alarm)`` pairs.
+        """
+        now = now if now is not None else datetime.datetime.now().timestamp()
+        due = []
+        with self.condition:
+            self._discard_cancelled()
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, _, alarm = heapq.heappop(self._heap)
+                del self._entries[alarm.id]
+                due.append((fire_at, alarm) if with_deadlines else alarm)
+                self._discard_cancelled()
+        return due
+
+    def clear(self):
+        """Drop every scheduled alarm"""
+        with self.condition:
+            self._heap.clear()
+            self._entries.clear()
+            self.condition.notify_all()
+
+
+SCHEDULER_BACKENDS = ("heap", "wheel")
+
+
+def create_scheduler(backend="heap"):
+    """Create a scheduler backend by name, "heap" or "wheel" """
+    if backend == "heap":
+        return HeapScheduler()
+    if backend == "wheel":
+        # Imported here because the wheel module builds on BaseScheduler
+        from src.core.timing_wheel import TimingWheelScheduler
+        return TimingWheelScheduler()
+    raise ValueError(f"Unknown scheduler backend: {backend}")
@@ -2,84 +2,201 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
 import time
-import datetime
+from src.core.alarm import MINUTES_PER_DAY
+from src.core.dispatcher import UIDispatcher, PREPARE, FIRE, SNOOZE, STOP, ALARMS_CHANGED
+from src.core.engine import AlarmEngine
+from src.core.fire import ActiveFire, SNOOZED, STOPPED
+from src.core.latency import LatencyRecorder, LATENCY_PATH, DISPATCH, DIALOG, AUDIO
+from src.core.scheduler import next_fire_time
 from src.data.database import Database
+from src.data.events import AlarmEvents, EVENT_FIRED, EVENT_SNOOZED, EVENT_STOPPED
+from src.data.settings import Settings
 from src.utils.audio_manager import AudioManager
 from src.utils.constants import COLORS
 
-class SmartAlarmClock:
-    def __init__(self, root):
+class SmartAlarmClock(AlarmEngine):
+    def __init__(self, root, scheduler_backend="heap"):
         self.root = root
         self.root.title("Smart Alarm Clock")
 
         # Initialize components
-        self.db = Database()
-        self.audio = AudioManager()
+        db = Database()
+        # Preferences are loaded once here and read from memory afterwards
+        settings = Settings(db)
+        # Lateness of every fire from its deadline to its sound, kept across runs
+        latency = LatencyRecorder(slo_ms=settings.get("fire_latency_slo_ms"))
+        latency.load(LATENCY_PATH)
+        settings.subscribe("fire_latency_slo_ms", lambda key, value: setattr(latency, "slo_ms", value))
+        # The schedule, its window and the checker loop live in AlarmEngine
+        super().__init__(db, settings, latency, AudioManager(settings), scheduler_backend)
+        self.events = AlarmEvents(self.db)
         self.colors = COLORS
-        self.is_dark_mode = False
 
         # Initialize style
         self.style = ttk.Style()
 
-        # Alarm settings
-        self.alarms = self.db.load_alarms()
+        # Alarms currently going off, keyed by alarm id
+        self.active_fires = {}
+        # Hidden dialogs of alarms about to fire: alarm id -> (fire_at, content key, dialog)
+        self.prepared_dialogs = {}
+
+        # Worker threads reach Tk only through the dispatcher's main-thread pump
+        self.dispatcher = UIDispatcher(self.root)
+        self.dispatcher.subscribe(PREPARE, self.prepare_alarms)
+        self.dispatcher.subscribe(FIRE, self.trigger_alarms)
+        self.dispatcher.start()
 
         # Start alarm checking thread
-        self.running = True
-        self.alarm_thread = threading.Thread(target=self.check_alarms)
+        self.alarm_thread = threading.Thread(target=self.run)
         self.alarm_thread.daemon = True
         self.alarm_thread.start()
 
         # Handle window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    @property
+    def is_dark_mode(self):
+        return self.settings.get("dark_mode")
+
+    @is_dark_mode.setter
+    def is_dark_mode(self, value):
+        self.settings.set("dark_mode", value)
+
     def set_ui(self, ui):
         """Set the UI instance for updates"""
         self.ui = ui
+        self.dispatcher.subscribe(ALARMS_CHANGED, ui.update_alarm_listbox)
+        # The widgets' first redraw is already queued as idle work, so this runs
+        # after first paint and pygame's import never delays the window
+        self.root.after_idle(self.audio.start)
+
+    def add_alarm(self, alarm):
+        """Schedule a newly saved alarm if it falls inside the loaded window"""
+        with self.alarms_lock:
+            self.window.keep(alarm, next_fire_time(alarm.minute, rule=alarm.rule))
+            # Scan again now, in case it fires before the next preload pass
+            self.request_preload()
+        if alarm.sound_path:
+            self.audio.prepare(alarm.sound_path)
+
+    def remove_alarm(self, alarm):
+        """Forget an alarm and unschedule it"""
+        with self.alarms_lock:
+            self.window.release(alarm)
+        self.discard_prepared_dialog(alarm.id)
+
+    def fire_due(self, due):
+        # The prepare stage loaded the sounds, so start them here rather than
+        # a dispatcher pump later. An alarm that starts or stops ringing
+        # meanwhile is sorted out by trigger_alarms.
+        channels = {alarm.id: self.start_alarm_sound(alarm)
+                    for _, alarm in due if alarm.id not in self.active_fires}
+        # Hand the whole batch over at once so simultaneous alarms all ring
+        self.dispatcher.post(FIRE, [alarm for _, alarm in due], channels)
+
+    def prepare_due(self, prepare):
+        super().prepare_due(prepare)
+        self.dispatcher.post(PREPARE, prepare)
+
+    def prepare_alarms(self, prepare):
+        """Build the dialogs of alarms about to fire, hidden until they do (runs on the main thread)"""
+        now = time.time()
+        for alarm_id, (fire_at, _, _) in list(self.prepared_dialogs.items()):
+            # Long past its deadline without firing: removed or moved some other way
+            if fire_at + 60 < now:
+                self.discard_prepared_dialog(alarm_id)
+        for fire_at, alarm in prepare:
+            self.discard_prepared_dialog(alarm.id)
+            self.prepared_dialogs[alarm.id] = (fire_at, self._dialog_key(alarm),
+                                               self.build_alarm_dialog(alarm))
 
-    def check_alarms(self):
-        """Check for active alarms"""
-        while self.running:
-            current_time = datetime.datetime.now()
-            for alarm in self.alarms:
-                alarm_time = datetime.datetime.strptime(alarm["time"], "%H:%M").time()
-                # Compare hours and minutes only
-                if (current_time.hour == alarm_time.hour and 
-                    current_time.minute == alarm_time.minute and 
-                    not hasattr(self, "alarm_triggered")):
-                    self.alarm_triggered = alarm
-                    self.trigger_alarm(alarm)
-            # Check every second instead of every 10 seconds
-            time.sleep(1)
-
-    def trigger_alarm(self, alarm):
-        """Trigger an alarm"""
+    def discard_prepared_dialog(self, alarm_id):
+        """Destroy an alarm's hidden dialog if one was built ahead"""
+        prepared = self.prepared_dialogs.pop(alarm_id, None)
+        if prepared is not None:
+            prepared[2].destroy()
+
+    def _dialog_key(self, alarm):
+        """What a dialog shows, so one built ahead can be checked against the alarm at fire time"""
+        return alarm.note, self.settings.get("snooze_minutes")
+
+    def trigger_alarms(self, alarms, channels=None):
+        """Start every alarm in a due batch (runs on the main thread).
+
+        ``channels`` maps alarm id to the handle of a sound the checker
+        thread already started.
+        """
+        channels = channels or {}
+        for alarm in alarms:
+            if alarm.id in self.active_fires:
+                # Still ringing from its previous occurrence; catch the next one
+                if channels.get(alarm.id) is not None:
+                    self.audio.stop_alarm(channels[alarm.id])
+                self.skip_occurrence(alarm)
+                continue
+            if alarm.id in channels:
+                self.trigger_alarm(alarm, channels[alarm.id])
+            else:
+                self.trigger_alarm(alarm, self.start_alarm_sound(alarm))
+
+    def start_alarm_sound(self, alarm):
+        """Play an alarm's sound on its own channel and return the handle (any thread).
+
+        The volume ramp runs on the audio control thread.
+        """
+        channel = self.audio.play_alarm(alarm.sound_path, gradual=True)
+        if channel is not None:
+            self.latency.mark(alarm.id, AUDIO)
+        return channel
+
+    def trigger_alarm(self, alarm, channel):
+        """Show a firing alarm's dialog; ``channel`` is its already started sound"""
+        self.latency.mark(alarm.id, DISPATCH)
+        fire = ActiveFire(alarm)
+        fire.channel = channel
+        # Cascade dialogs so simultaneous alarms don't hide each other
+        offset = 20 * len(self.active_fires)
+        self.active_fires[alarm.id] = fire
+        self.events.record(alarm.id, EVENT_FIRED, at=fire.started_at)
         self.root.deiconify()
-        
-        # Create alarm dialog
-        self.alarm_dialog = tk.Toplevel(self.root)
-        self.alarm_dialog.title("Alarm!")
-        self.alarm_dialog.lift()  # Bring window to front
-        self.alarm_dialog.focus_force()  # Force focus
-        
-        # Make dialog stay on top
-        self.alarm_dialog.attributes('-topmost', True)
-        
+
+        prepared = self.prepared_dialogs.pop(alarm.id, None)
+        if prepared is not None and prepared[1] == self._dialog_key(alarm):
+            fire.dialog = prepared[2]
+        else:
+            if prepared is not None:
+                prepared[2].destroy()
+            fire.dialog = self.build_alarm_dialog(alarm)
+
         # Center the dialog on screen
         window_width = 200  # Reduced width
         window_height = 100  # Reduced height
-        screen_width = self.alarm_dialog.winfo_screenwidth()
-        screen_height = self.alarm_dialog.winfo_screenheight()
-        x = (screen_width - window_width) // 2
-        y = (screen_height - window_height) // 2
-        self.alarm_dialog.geometry(f'{window_width}x{window_height}+{x}+{y}')
+        screen_width = fire.dialog.winfo_screenwidth()
+        screen_height = fire.dialog.winfo_screenheight()
+        x = (screen_width - window_width) // 2 + offset
+        y = (screen_height - window_height) // 2 + offset
+        fire.dialog.geometry(f'{window_width}x{window_height}+{x}+{y}')
+        fire.dialog.deiconify()
+        fire.dialog.lift()  # Bring window to front
+        fire.dialog.focus_force()  # Force focus
+
+    def build_alarm_dialog(self, alarm):
+        """Create an alarm's dialog withdrawn; trigger_alarm places and shows it"""
+        dialog = tk.Toplevel(self.root)
+        dialog.withdraw()
+        # Mapping the dialog is when it actually appears; repeat marks are ignored
+        dialog.bind("<Map>", lambda event: self.latency.mark(alarm.id, DIALOG), add="+")
+        dialog.title("Alarm!")
+        
+        # Make dialog stay on top
+        dialog.attributes('-topmost', True)
         
         # Configure dialog layout
-        dialog_frame = ttk.Frame(self.alarm_dialog)
+        dialog_frame = ttk.Frame(dialog)
         dialog_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Add message
-        message = alarm['note'] if alarm['note'] else 'Time to wake up!'
+        message = alarm.note if alarm.note else 'Time to wake up!'
         message_label = ttk.Label(
             dialog_frame,
             text=message,
@@ -96,8 +213,8 @@ class SmartAlarmClock:
         # Snooze button
         snooze_btn = ttk.Button(
             button_frame,
-            text="Snooze (5 min)",
-            command=lambda: [self.snooze_alarm(), self.alarm_dialog.destroy()]
+            text=f"Snooze ({self.settings.get('snooze_minutes')} min)",
+            command=lambda: self.snooze_alarm(alarm.id)
         )
         snooze_btn.pack(side=tk.LEFT, padx=2)
         
@@ -105,59 +222,101 @@ class SmartAlarmClock:
         stop_btn = ttk.Button(
             button_frame,
             text="Stop Alarm",
-            command=lambda: [self.stop_alarm(), self.alarm_dialog.destroy()]
+            command=lambda: self.stop_alarm(alarm.id)
         )
         stop_btn.pack(side=tk.LEFT, padx=2)
         
-        # Play alarm sound
-        self.audio.play_alarm(alarm["sound_path"], gradual=True)
-        
         # Prevent closing with Alt+F4
-        self.alarm_dialog.protocol("WM_DELETE_WINDOW", lambda: None)
+        dialog.protocol("WM_DELETE_WINDOW", lambda: None)
+        return dialog
 
-    def snooze_alarm(self):
-        """Snooze the current alarm"""
-        if hasattr(self, "alarm_triggered"):
-            self.audio.stop_alarm()
-            alarm = self.alarm_triggered
-
-            # Calculate snooze time
-            alarm_time = datetime.datetime.strptime(alarm["time"], "%H:%M")
-            snooze_time = alarm_time + datetime.timedelta(minutes=5)
-            new_time = snooze_time.strftime("%H:%M")
-
-            # Update alarm in database
-            self.db.update_alarm_time(alarm, new_time)
-            alarm["time"] = new_time
-            if hasattr(self, 'ui'):
-                self.ui.update_alarm_listbox()
-            self.cleanup_alarm()
-
-    def stop_alarm(self):
-        """Stop the current alarm"""
-        if hasattr(self, "alarm_triggered"):
-            self.audio.stop_alarm()
-            alarm = self.alarm_triggered
-            self.db.deactivate_alarm(alarm)
-            if alarm in self.alarms:
-                self.alarms.remove(alarm)
-            if hasattr(self, 'ui'):
-                self.ui.update_alarm_listbox()
-            self.cleanup_alarm()
-
-    def cleanup_alarm(self):
+    def snooze_alarm(self, alarm_id):
+        """Snooze one ringing alarm"""
+        fire = self.active_fires.get(alarm_id)
+        if fire is None:
+            return
+        fire.state = SNOOZED
+        alarm = fire.alarm
+        with self.alarms_lock:
+            deleted = alarm.id not in self.alarms
+        if deleted:
+            # Removed from the list while it rang: just silence it
+            self.cleanup_alarm(alarm_id)
+            return
+        snooze_minutes = self.settings.get("snooze_minutes")
+        alarm.snooze_count += 1
+        self.db.increment_snooze_count(alarm)
+        self.events.record(alarm.id, EVENT_SNOOZED, duration=time.time() - fire.started_at)
+
+        if alarm.recurring:
+            # Ring again after the snooze without moving the rule's time. The
+            # database can't reproduce this instant, so it stays in memory.
+            with self.alarms_lock:
+                self.alarms[alarm.id] = alarm
+                self.scheduler.reschedule(alarm, time.time() + snooze_minutes * 60)
+                self.request_preload()
+            self.dispatcher.post(SNOOZE, alarm)
+            self.cleanup_alarm(alarm_id)
+            return
+
+        # Calculate snooze time
+        snooze_minute = (alarm.minute + snooze_minutes) % MINUTES_PER_DAY
+
+        # Update alarm in database
+        self.db.update_alarm_time(alarm, snooze_minute)
+        with self.alarms_lock:
+            alarm.minute = snooze_minute
+            self.alarms[alarm.id] = alarm
+            self.scheduler.reschedule(alarm)
+            self.request_preload()
+        self.dispatcher.post(SNOOZE, alarm)
+        self.dispatcher.post(ALARMS_CHANGED)
+        self.cleanup_alarm(alarm_id)
+
+    def stop_alarm(self, alarm_id):
+        """Stop one ringing alarm"""
+        fire = self.active_fires.get(alarm_id)
+        if fire is None:
+            return
+        fire.state = STOPPED
+        alarm = fire.alarm
+        self.events.record(alarm.id, EVENT_STOPPED, duration=time.time() - fire.started_at)
+        # Recurring alarms advance to their next occurrence instead of deactivating
+        self.retire(alarm)
+        self.dispatcher.post(STOP, alarm)
+        if not alarm.recurring:
+            self.dispatcher.post(ALARMS_CHANGED)
+        self.cleanup_alarm(alarm_id)
+
+    def cleanup_alarm(self, alarm_id):
         """Cleanup after alarm"""
-        if hasattr(self, 'alarm_dialog') and self.alarm_dialog:
-            self.alarm_dialog.destroy()
-        delattr(self, "alarm_triggered")
+        fire = self.active_fires.pop(alarm_id, None)
+        if fire is None:
+            return
+        self.latency.discard(alarm_id)
+        if fire.dialog:
+            fire.dialog.destroy()
+        if fire.channel:
+            self.audio.stop_alarm(fire.channel)
 
     def on_closing(self):
         """Handle window closing"""
-        self.running = False
-        if hasattr(self, "alarm_triggered"):
+        self.stop()
+        self.dispatcher.stop()
+        if self.active_fires:
             self.audio.stop_alarm()
-            if hasattr(self, 'alarm_dialog') and self.alarm_dialog:
-                self.alarm_dialog.destroy()
+            for fire in self.active_fires.values():
+                if fire.dialog:
+                    fire.dialog.destroy()
+            self.active_fires.clear()
+        for alarm_id in list(self.prepared_dialogs):
+            self.discard_prepared_dialog(alarm_id)
+        try:
+            self.latency.dump(LATENCY_PATH)
+        except OSError as e:
+            print(f"Could not save fire latency: {e}")
+        # Commit anything still queued in the write-behind writer before exit
+        self.db.flush()
         self.db.close()
         self.audio.quit()
         self.root.destroy()
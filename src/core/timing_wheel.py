@@ -0,0 +1,172 @@
+import datetime
+from src.core.scheduler import BaseScheduler, next_fire_time
+
+# Level sizes and the length of one slot in seconds: second, minute, hour, day
+WHEEL_SLOTS = (60, 60, 24, 366)
+SLOT_SECONDS = (1, 60, 3600, 86400)
+
+
+class TimingWheelScheduler(BaseScheduler):
+    """Hashed hierarchical timing wheel with second, minute, hour and day levels.
+
+    An entry goes into the coarsest level that still resolves it and is
+    cascaded one level down each time the wheel crosses that slot's
+    boundary. Slots are dicts, so insert and cancel are O(1); each entry is
+    touched at most once per level, which keeps tick processing amortized
+    O(1). The day level is hashed: entries further out than one rotation
+    share a slot and are simply re-inserted when it cascades.
+
+    Empty lower levels are skipped in a single step, so advancing over an
+    idle night costs a handful of iterations rather than one per second.
+    """
+
+    def __init__(self, now=None):
+        super().__init__()
+        self._levels = [[{} for _ in range(slots)] for slots in WHEEL_SLOTS]
+        self._counts = [0] * len(WHEEL_SLOTS)
+        self._ready = {}
+        self._entries = {}
+        self._tick = int(now if now is not None else datetime.datetime.now().timestamp())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, alarm):
+        return alarm.id in self._entries
+
+    def _insert(self, entry):
+        """Place an entry in the right slot relative to the current tick"""
+        tick = entry[1]
+        delta = tick - self._tick
+        if delta <= 0:
+            slot, level = self._ready, None
+        else:
+            level = 0
+            while level < len(WHEEL_SLOTS) - 1 and delta >= SLOT_SECONDS[level + 1]:
+                level += 1
+            index = (tick // SLOT_SECONDS[level]) % WHEEL_SLOTS[level]
+            slot = self._levels[level][index]
+            self._counts[level] += 1
+        slot[entry[2].id] = entry
+        entry[3] = slot
+        entry[4] = level
+
+    def add(self, alarm, fire_at=None):
+        """Schedule an alarm, replacing any existing entry for it"""
+        if fire_at is None:
+            fire_at = next_fire_time(alarm.minute, rule=alarm.rule)
+        with self.condition:
+            self.remove(alarm)
+            # [fire_at, tick, alarm, slot, level]
+            entry = [fire_at, int(fire_at), alarm, None, None]
+            self._entries[alarm.id] = entry
+            self._insert(entry)
+            self.condition.notify_all()
+
+    def remove(self, alarm):
+        """Cancel an alarm if it is scheduled"""
+        with self.condition:
+            entry = self._entries.pop(alarm.id, None)
+            if entry is not None:
+                del entry[3][alarm.id]
+                if entry[4] is not None:
+                    self._counts[entry[4]] -= 1
+                self.condition.notify_all()
+
+    def load(self, alarms):
+        """Replace the schedule, computing every fire instant against one clock read"""
+        now = datetime.datetime.now()
+        with self.condition:
+            self.clear()
+            self._tick = int(now.timestamp())
+            for alarm in alarms:
+                fire_at = next_fire_time(alarm.minute, now, alarm.rule)
+                entry = [fire_at, int(fire_at), alarm, None, None]
+                self._entries[alarm.id] = entry
+                self._insert(entry)
+            self.condition.notify_all()
+
+    def _cascade(self, level):
+        """Move the slot the current tick just entered down to finer levels"""
+        index = (self._tick // SLOT_SECONDS[level]) % WHEEL_SLOTS[level]
+        slot = self._levels[level][index]
+        if not slot:
+            return
+        self._levels[level][index] = {}
+        self._counts[level] -= len(slot)
+        for entry in slot.values():
+            self._insert(entry)
+
+    def _advance(self, target):
+        """Move the current tick forward to target, cascading and collecting due entries"""
+        while self._tick < target:
+            # Jump straight to the next boundary that can hold work
+            for level in range(len(WHEEL_SLOTS) - 1):
+                if self._counts[level]:
+                    break
+            else:
+                level = len(WHEEL_SLOTS) - 1
+            step = SLOT_SECONDS[level] - self._tick % SLOT_SECONDS[level] if level else 1
+            self._tick = min(self._tick + step, target)
+
+            for upper in range(len(WHEEL_SLOTS) - 1, 0, -1):
+                if self._tick % SLOT_SECONDS[upper] == 0:
+                    self._cascade(upper)
+            slot = self._levels[0][self._tick % WHEEL_SLOTS[0]]
+            if slot:
+                self._levels[0][self._tick % WHEEL_SLOTS[0]] = {}
+                self._counts[0] -= len(slot)
+                for entry in slot.values():
+                    self._ready[entry[2].id] = entry
+                    entry[3] = self._ready
+                    entry[4] = None
+
+    def next_deadline(self):
+        """Return the earliest fire instant, or None if nothing is scheduled"""
+        with self.condition:
+            if self._ready:
+                return min(entry[0] for entry in self._ready.values())
+            # An entry parked on a coarse level can still be due before one
+            # that was inserted later on a finer level, so check every level
+            candidates = [self._level_deadline(level)
+                          for level in range(len(WHEEL_SLOTS)) if self._counts[level]]
+            return min(candidates) if candidates else None
+
+    def _level_deadline(self, level):
+        """Return the earliest fire instant held on one non-empty level"""
+        slots = self._levels[level]
+        size = WHEEL_SLOTS[level]
+        start = self._tick // SLOT_SECONDS[level]
+        for offset in range(1, size + 1):
+            slot = slots[(start + offset) % size]
+            # Skip hashed day entries that belong to a later rotation
+            in_rotation = [entry[0] for entry in slot.values()
+                           if entry[1] // SLOT_SECONDS[level] == start + offset]
+            if in_rotation:
+                return min(in_rotation)
+        return min(entry[0] for slot in slots for entry in slot.values())
+
+    def pop_due(self, now=None, with_deadlines=False):
+        """Remove and return every alarm whose deadline has passed.
+
+        With ``with_deadlines`` the items are ``(fire_at, alarm)`` pairs.
+        """
+        now = now if now is not None else datetime.datetime.now().timestamp()
+        with self.condition:
+            self._advance(int(now))
+            due = [entry for entry in self._ready.values() if entry[0] <= now]
+            for entry in due:
+                del self._ready[entry[2].id]
+                del self._entries[entry[2].id]
+        if with_deadlines:
+            return [(entry[0], entry[2]) for entry in due]
+        return [entry[2] for entry in due]
+
+    def clear(self):
+        """Drop every scheduled alarm"""
+        with self.condition:
+            self._levels = [[{} for _ in range(slots)] for slots in WHEEL_SLOTS]
+            self._counts = [0] * len(WHEEL_SLOTS)
+            self._ready = {}
+            self._entries = {}
+            self.condition.notify_all()
@@ -0,0 +1,90 @@
+import datetime
+import time
+
+from src.core.alarm import format_time
+
+
+class AlarmWindow:
+    """Keeps only the next stretch of upcoming alarms in memory.
+
+    The database is walked in (time, id) keyset pages starting at the
+    current minute, one calendar day per pass, wrapping at midnight into the
+    next day. Every alarm that fires on the day being walked is scheduled
+    at its instant on that day. ``refill`` reads pages until the window
+    reaches ``horizon`` seconds ahead (or ``capacity`` alarms are waiting),
+    so startup cost and memory depend on how busy the next hour is, not on
+    how many alarms exist.
+
+    ``alarms`` is the owner's dict of in-memory alarms keyed by id. Alarms
+    already in it (ringing, snoozed or explicitly scheduled) are skipped by
+    the walk. Every alarm with a fire instant later than ``loaded_until`` is
+    still ahead of the cursor, so ``keep`` can drop it and let the walk load
+    it again when its turn comes. All methods must be called with the
+    scheduler's condition held.
+    """
+
+    def __init__(self, db, scheduler, alarms, page_size=500, horizon=3600, capacity=5000, now=None):
+        self.db = db
+        self.scheduler = scheduler
+        self.alarms = alarms
+        self.page_size = page_size
+        self.horizon = horizon
+        self.capacity = capacity
+        now = datetime.datetime.fromtimestamp(now or time.time())
+        self._day = now.date()
+        # The current minute is still due, exactly like next_fire_time
+        self._cursor = (format_time(now.hour * 60 + now.minute), 0)
+        self.loaded_until = now.replace(second=0, microsecond=0).timestamp() - 1
+
+    def refill(self, now=None):
+        """Load pages until the window covers ``horizon`` seconds from now"""
+        now = now or time.time()
+        while self.loaded_until < now + self.horizon:
+            # Past the capacity only keep going while nothing is left to wait for
+            if len(self.scheduler) >= self.capacity and self.loaded_until > now:
+                break
+            self._load_page()
+
+    @property
+    def refill_at(self):
+        """Epoch timestamp at which ``refill`` has more work to do"""
+        halfway = self.loaded_until - self.horizon / 2
+        return halfway if halfway > time.time() else self.loaded_until
+
+    def covers(self, fire_at):
+        return fire_at <= self.loaded_until
+
+    def keep(self, alarm, fire_at):
+        """Schedule an alarm if its next fire is inside the window, else release it"""
+        if self.covers(fire_at):
+            self.alarms[alarm.id] = alarm
+            self.scheduler.reschedule(alarm, fire_at)
+        else:
+            self.release(alarm)
+
+    def release(self, alarm):
+        """Forget an alarm; the walk reloads it from the database if still active"""
+        self.alarms.pop(alarm.id, None)
+        self.scheduler.remove(alarm)
+
+    def _load_page(self):
+        page = self.db.load_alarm_page(self._cursor, self.page_size)
+        for alarm in page:
+            if alarm.id in self.alarms:
+                continue
+            if alarm.rule and alarm.rule.next_date(self._day) != self._day:
+                continue
+            fire_at = datetime.datetime.combine(
+                self._day, datetime.time(alarm.minute // 60, alarm.minute % 60)).timestamp()
+            self.alarms[alarm.id] = alarm
+            self.scheduler.add(alarm, fire_at)
+        if len(page) < self.page_size:
+            # This day is exhausted; start the next one from its first minute
+            self._day += datetime.timedelta(days=1)
+            self._cursor = ("", 0)
+            self.loaded_until = datetime.datetime.combine(self._day, datetime.time()).timestamp() - 1
+        else:
+            last = page[-1]
+            self._cursor = (last.time, last.id)
+            self.loaded_until = datetime.datetime.combine(
+                self._day, datetime.time(last.minute // 60, last.minute % 60)).timestamp()
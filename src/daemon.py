@@ -0,0 +1,146 @@
+"""Headless alarm daemon for servers and kiosks.
+
+Runs the scheduler, the database and (optionally) the AudioManager without
+importing tkinter or any other GUI toolkit:
+
+    python -m src.daemon --notify stdout --notify command --command "notify-send Alarm"
+"""
+import argparse
+import logging
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the src directory to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.engine import AlarmEngine
+from src.core.fire import ActiveFire, STOPPED
+from src.core.latency import LatencyRecorder, DAEMON_LATENCY_PATH, WAKE, DISPATCH, AUDIO
+from src.core.notifiers import NOTIFIERS, create_notifier
+from src.core.scheduler import SCHEDULER_BACKENDS
+from src.data.database import Database
+from src.data.events import AlarmEvents, EVENT_FIRED, EVENT_STOPPED
+from src.data.settings import Settings
+
+class AlarmDaemon(AlarmEngine):
+    """Delivers alarms to notifiers instead of dialogs.
+
+    There is nobody to press Stop, so each fire rings for ``ring_seconds``
+    and is then stopped automatically: recurring alarms advance to their
+    next occurrence and one-shot alarms are deactivated, exactly as the
+    Stop button does in the GUI.
+    """
+
+    def __init__(self, notifiers, scheduler_backend="heap", audio=True, ring_seconds=60):
+        db = Database()
+        settings = Settings(db)
+        manager = None
+        if audio:
+            # pygame is only imported when sound is actually wanted
+            from src.utils.audio_manager import AudioManager
+            manager = AudioManager(settings)
+            manager.start()
+        # No dialogs here; audio is only a stage when sound is on
+        latency = LatencyRecorder((WAKE, DISPATCH, AUDIO) if audio else (WAKE, DISPATCH),
+                                  slo_ms=settings.get("fire_latency_slo_ms"))
+        latency.load(DAEMON_LATENCY_PATH)
+        super().__init__(db, settings, latency, manager, scheduler_backend)
+        self.events = AlarmEvents(self.db)
+        self.notifiers = notifiers
+        self.ring_seconds = ring_seconds
+        self.active_fires = {}
+
+    def fire_due(self, due):
+        for _, alarm in due:
+            self.fire_alarm(alarm)
+
+    def fire_alarm(self, alarm):
+        """Start the sound, notify and arm the automatic stop"""
+        self.latency.mark(alarm.id, DISPATCH)
+        if alarm.id in self.active_fires:
+            self.skip_occurrence(alarm)
+            return
+        fire = self.active_fires[alarm.id] = ActiveFire(alarm)
+        # Sound first: notifiers may run commands, and the sound is already loaded
+        if self.audio:
+            fire.channel = self.audio.play_alarm(alarm.sound_path)
+            if fire.channel is not None:
+                self.latency.mark(alarm.id, AUDIO)
+            else:
+                self.latency.discard(alarm.id)
+        self.events.record(alarm.id, EVENT_FIRED, at=fire.started_at)
+        for notifier in self.notifiers:
+            notifier.alarm_fired(alarm)
+        # Database work stays on the loop thread; the timer only queues the stop
+        timer = threading.Timer(self.ring_seconds, self.call_soon, args=(self.stop_alarm, alarm.id))
+        timer.daemon = True
+        timer.start()
+
+    def stop_alarm(self, alarm_id):
+        """Stop one ringing alarm"""
+        fire = self.active_fires.pop(alarm_id, None)
+        if fire is None:
+            return
+        fire.state = STOPPED
+        alarm = fire.alarm
+        self.events.record(alarm.id, EVENT_STOPPED, duration=time.time() - fire.started_at)
+        self.retire(alarm)
+        for notifier in self.notifiers:
+            notifier.alarm_stopped(alarm)
+        if fire.channel:
+            self.audio.stop_alarm(fire.channel)
+
+    def request_stop(self, *args):
+        """Ask the run loop to exit; safe from signal handlers and other threads"""
+        self.stop()
+
+    def close(self):
+        """Release audio and database resources and save the fire latency histograms"""
+        try:
+            self.latency.dump(DAEMON_LATENCY_PATH)
+        except OSError as e:
+            logging.getLogger("alarmclock").warning("Could not save fire latency: %s", e)
+        if self.audio:
+            self.audio.stop_alarm()
+            self.audio.quit()
+        self.db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the alarm scheduler without a GUI")
+    parser.add_argument("--notify", action="append", choices=NOTIFIERS,
+                        help="where to deliver alarms (repeatable, default: log)")
+    parser.add_argument("--command", help="command run by the command notifier")
+    parser.add_argument("--backend", choices=SCHEDULER_BACKENDS, default="heap",
+                        help="scheduler backend")
+    parser.add_argument("--no-audio", action="store_true", help="do not play alarm sounds")
+    parser.add_argument("--ring-seconds", type=float, default=60,
+                        help="how long an alarm rings before stopping itself")
+    parser.add_argument("--log-file", help="write the log notifier output here instead of stderr")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, filename=args.log_file,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        notifiers = [create_notifier(name, args.command) for name in args.notify or ["log"]]
+    except ValueError as e:
+        parser.error(str(e))
+
+    daemon = AlarmDaemon(notifiers,
+                         scheduler_backend=args.backend,
+                         audio=not args.no_audio,
+                         ring_seconds=args.ring_seconds)
+    signal.signal(signal.SIGTERM, daemon.request_stop)
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+
+
+if __name__ == "__main__":
+    main()
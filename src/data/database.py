@@ -1,65 +1,154 @@
-import sqlite3
+import logging
+import os
+from src.core.alarm import Alarm, format_time
+from src.data.migrations import migrate
+from src.data.pool import ConnectionPool
+from src.data.writer import WriteBehindWriter
+
+ALARM_COLUMNS = "id, time, sound_path, note, snooze_count, repeat_rule, repeat_value, repeat_anchor"
+
+# Next to this module rather than relative to whatever the CWD happens to be
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alarms.db')
+# Where earlier releases kept it: relative to the CWD
+LEGACY_DB_PATH = 'alarms.db'
+# Columns a legacy alarms table may have, in the order they were added
+LEGACY_ALARM_COLUMNS = ("time", "sound_path", "note", "active", "snooze_count",
+                        "repeat_rule", "repeat_value", "repeat_anchor")
+
+logger = logging.getLogger("alarmclock")
 
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect('alarms.db')
+    def __init__(self, path=DB_PATH):
+        self.pool = ConnectionPool(path)
         self.create_tables()
+        if path == DB_PATH:
+            self.adopt_legacy(LEGACY_DB_PATH)
+        # Mutations are group-committed on a background writer thread
+        self.writer = WriteBehindWriter(self.pool.connection)
+
+    @property
+    def conn(self):
+        """The calling thread's connection"""
+        return self.pool.connection()
 
     def create_tables(self):
-        """Create necessary database tables"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS alarms (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                time TEXT,
-                sound_path TEXT,
-                note TEXT,
-                active BOOLEAN,
-                snooze_count INTEGER DEFAULT 0
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        ''')
-        self.conn.commit()
-
-    def save_alarm(self, time, sound_path, note, active=True):
-        """Save a new alarm to the database"""
-        cursor = self.conn.cursor()
-        cursor.execute("INSERT INTO alarms (time, sound_path, note, active) VALUES (?, ?, ?, ?)",
-                      (time, sound_path, note, active))
-        self.conn.commit()
+        """Create or upgrade the database tables"""
+        migrate(self.conn)
 
-    def load_alarms(self):
-        """Load active alarms from database"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT time, sound_path, note, active FROM alarms WHERE active = 1")
-        return [{"time": row[0], "sound_path": row[1], "note": row[2]} for row in cursor.fetchall()]
+    def adopt_legacy(self, legacy_path):
+        """Copy the alarms of a database left at ``legacy_path`` into this one.
+
+        Runs once per legacy file: afterwards it is renamed to
+        ``<name>.migrated``, which also keeps it as a backup. Alarm ids are
+        renumbered and settings already stored here win. A legacy file
+        without alarms is left alone. Returns the number of alarms adopted.
+        """
+        legacy = os.path.abspath(legacy_path)
+        if not os.path.isfile(legacy) or os.path.abspath(self.pool.path) == legacy:
+            return 0
+        conn = self.conn
+        conn.execute("ATTACH DATABASE ? AS legacy", (legacy,))
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM legacy.sqlite_master WHERE type = 'table'")}
+            if "alarms" not in tables:
+                return 0
+            present = {row[1] for row in conn.execute("PRAGMA legacy.table_info(alarms)")}
+            columns = ", ".join(column for column in LEGACY_ALARM_COLUMNS if column in present)
+            with conn:
+                adopted = conn.execute(f"INSERT INTO main.alarms ({columns}) "
+                                       f"SELECT {columns} FROM legacy.alarms ORDER BY id").rowcount
+                if adopted and "settings" in tables:
+                    conn.execute("INSERT OR IGNORE INTO main.settings (key, value) "
+                                 "SELECT key, value FROM legacy.settings")
+                if not adopted:
+                    return 0
+        finally:
+            conn.execute("DETACH DATABASE legacy")
+        os.replace(legacy, legacy + ".migrated")
+        logger.info("Moved %d alarms from %s to %s", adopted, legacy, self.pool.path)
+        return adopted
+
+    def save_alarm(self, time, sound_path, note, active=True, rule=None):
+        """Save a new alarm to the database and return its id.
+
+        Waits for the writer because the caller needs the new row id, so the
+        flush window is cut short; the insert still shares a transaction with
+        any other writes already queued.
+        """
+        repeat = rule.to_columns() if rule else (None, None, None)
+        future = self.writer.submit(
+            "INSERT INTO alarms (time, sound_path, note, active, repeat_rule, repeat_value, repeat_anchor) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (time, sound_path, note, active) + repeat,
+            flush=True)
+        return future.result()[0]
 
-    def update_alarm_time(self, alarm, new_time):
-        """Update alarm time (for snooze)"""
+    def insert_alarms(self, rows):
+        """Insert many (time, sound_path, note, active, repeat_rule, repeat_value,
+        repeat_anchor) rows in one transaction and return how many were added.
+
+        Runs on the caller's connection with ``executemany`` instead of going
+        through the writer, so bulk loads don't pay a Future per row.
+        """
+        self.writer.flush()
+        conn = self.conn
+        with conn:
+            cursor = conn.executemany(
+                "INSERT INTO alarms (time, sound_path, note, active, repeat_rule, repeat_value, repeat_anchor) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return cursor.rowcount
+
+    def load_alarm_page(self, after=None, limit=50):
+        """Load up to ``limit`` active alarms ordered by (time, id).
+
+        ``after`` is the (time, id) of the last alarm on the previous page;
+        keyset pagination keeps every page an index range scan no matter how
+        deep it is. Only committed rows are seen; callers that need their
+        own queued writes call ``flush`` once beforehand.
+        """
         cursor = self.conn.cursor()
-        cursor.execute("UPDATE alarms SET time = ? WHERE time = ? AND sound_path = ? AND note = ?",
-                      (new_time, alarm["time"], alarm["sound_path"], alarm["note"]))
-        self.conn.commit()
+        if after is None:
+            cursor.execute(f"SELECT {ALARM_COLUMNS} FROM alarms WHERE active = 1 "
+                           "ORDER BY time, id LIMIT ?", (limit,))
+        else:
+            # Row-value comparison lets sqlite seek the index instead of scanning
+            cursor.execute(f"SELECT {ALARM_COLUMNS} FROM alarms WHERE active = 1 "
+                           "AND (time, id) > (?, ?) "
+                           "ORDER BY time, id LIMIT ?", tuple(after) + (limit,))
+        return [Alarm.from_row(row) for row in cursor]
+
+    def iter_alarms(self, after=None, page_size=1000):
+        """Stream active alarms in (time, id) order, one page in memory at a time"""
+        while True:
+            page = self.load_alarm_page(after, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = (page[-1].time, page[-1].id)
+
+    def update_alarm_time(self, alarm, new_minute):
+        """Update alarm time (for snooze); returns a Future for the write"""
+        return self.writer.submit("UPDATE alarms SET time = ? WHERE id = ?",
+                                  (format_time(new_minute), alarm.id))
+
+    def increment_snooze_count(self, alarm):
+        """Count one more snooze for an alarm; returns a Future for the write"""
+        return self.writer.submit("UPDATE alarms SET snooze_count = snooze_count + 1 WHERE id = ?",
+                                  (alarm.id,))
 
     def deactivate_alarm(self, alarm):
-        """Deactivate an alarm"""
-        cursor = self.conn.cursor()
-        cursor.execute("UPDATE alarms SET active = 0 WHERE time = ? AND sound_path = ? AND note = ?",
-                      (alarm["time"], alarm["sound_path"], alarm["note"]))
-        self.conn.commit()
+        """Deactivate an alarm; returns a Future for the write"""
+        return self.writer.submit("UPDATE alarms SET active = 0 WHERE id = ?", (alarm.id,))
 
     def delete_alarm(self, alarm):
-        """Delete an alarm"""
-        cursor = self.conn.cursor()
-        cursor.execute("UPDATE alarms SET active = 0 WHERE time = ? AND sound_path = ? AND note = ?",
-                      (alarm["time"], alarm["sound_path"], alarm["note"]))
-        self.conn.commit()
+        """Delete an alarm; returns a Future for the write"""
+        return self.writer.submit("UPDATE alarms SET active = 0 WHERE id = ?", (alarm.id,))
+
+    def flush(self):
+        """Block until every queued write is committed"""
+        self.writer.flush()
 
     def close(self):
-        """Close database connection"""
-        self.conn.close()
\ No newline at end of file
+        """Flush pending writes and close database connections"""
+        self.writer.close()
+        self.pool.close()
\ No newline at end of file
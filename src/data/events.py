@@ -0,0 +1,70 @@
+import time
+
+# Event kinds stored in alarm_events
+EVENT_FIRED = "fired"
+EVENT_SNOOZED = "snoozed"
+EVENT_STOPPED = "stopped"
+EVENT_KINDS = (EVENT_FIRED, EVENT_SNOOZED, EVENT_STOPPED)
+
+DAY = 24 * 3600
+
+
+class AlarmEvents:
+    """Append-only history of alarm fires, snoozes and stops.
+
+    ``record`` only queues an INSERT on the database's write-behind writer,
+    so logging from the fire path never waits for sqlite. Events older than
+    ``retention_days`` are trimmed at startup and then at most once a day,
+    also through the writer. ``duration`` is how long the alarm had been
+    ringing when it was snoozed or stopped.
+    """
+
+    def __init__(self, db, retention_days=365):
+        self.db = db
+        self.retention_days = retention_days
+        self._next_trim = 0
+        self.trim()
+
+    def record(self, alarm_id, kind, duration=None, at=None):
+        """Queue one event; returns a Future for the write"""
+        at = at or time.time()
+        if at >= self._next_trim:
+            self.trim(at)
+        return self.db.writer.submit(
+            "INSERT INTO alarm_events (alarm_id, kind, at, duration) VALUES (?, ?, ?, ?)",
+            (alarm_id, kind, at, duration))
+
+    def trim(self, now=None):
+        """Queue deletion of events past the retention period"""
+        now = now or time.time()
+        self._next_trim = now + DAY
+        cutoff = now - self.retention_days * DAY
+        # One range delete per kind, each served by the (kind, at) index
+        for kind in EVENT_KINDS:
+            self.db.writer.submit("DELETE FROM alarm_events WHERE kind = ? AND at < ?", (kind, cutoff))
+
+    def counts_per_alarm(self, kind, days=30, now=None):
+        """Return {alarm_id: number of ``kind`` events in the last ``days`` days}"""
+        since = (now or time.time()) - days * DAY
+        self.db.flush()
+        return dict(self.db.conn.execute(
+            "SELECT alarm_id, COUNT(*) FROM alarm_events WHERE kind = ? AND at >= ? GROUP BY alarm_id",
+            (kind, since)))
+
+    def snoozes_per_alarm(self, days=30, now=None):
+        return self.counts_per_alarm(EVENT_SNOOZED, days, now)
+
+    def time_to_stop(self, days=30, now=None):
+        """Return {alarm_id: mean seconds from firing to being stopped} over the last ``days`` days"""
+        since = (now or time.time()) - days * DAY
+        self.db.flush()
+        return dict(self.db.conn.execute(
+            "SELECT alarm_id, AVG(duration) FROM alarm_events WHERE kind = ? AND at >= ? GROUP BY alarm_id",
+            (EVENT_STOPPED, since)))
+
+    def history(self, alarm_id, since=0, limit=100):
+        """Most recent (kind, at, duration) events of one alarm, newest first"""
+        self.db.flush()
+        return self.db.conn.execute(
+            "SELECT kind, at, duration FROM alarm_events WHERE alarm_id = ? AND at >= ? "
+            "ORDER BY at DESC LIMIT ?", (alarm_id, since, limit)).fetchall()
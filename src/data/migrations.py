@@ -0,0 +1,109 @@
+"""Versioned schema migrations for alarms.db.
+
+The schema version lives in ``PRAGMA user_version``. Each step runs in its
+own transaction together with the version bump, so an interrupted upgrade
+resumes from the last completed step. Steps are idempotent because
+databases created before versioning already carry some of their changes.
+
+Steps must stay cheap on large tables: ``ALTER TABLE ... ADD COLUMN`` only
+rewrites the schema entry, and ``CREATE INDEX`` reads the table once without
+rewriting it. Never add a step that copies the table.
+"""
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_column(conn, table, column, column_type):
+    if column not in _columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def initial_schema(conn):
+    """Tables as the app first shipped them"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS alarms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            time TEXT,
+            sound_path TEXT,
+            note TEXT,
+            active BOOLEAN,
+            snooze_count INTEGER DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+
+def recurrence_columns(conn):
+    """Repeat rule columns for recurring alarms"""
+    _add_column(conn, "alarms", "repeat_rule", "TEXT")
+    _add_column(conn, "alarms", "repeat_value", "INTEGER")
+    _add_column(conn, "alarms", "repeat_anchor", "TEXT")
+
+
+def active_time_index(conn):
+    """Partial index over active alarms, ordered by time (id rides along as the rowid)"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alarms_active_time ON alarms (time) WHERE active = 1")
+
+
+def alarm_events(conn):
+    """Append-only fire/snooze/stop history.
+
+    (kind, at, alarm_id, duration) covers the per-kind time-range
+    aggregates and the age-based trim; (alarm_id, at) serves one alarm's
+    history.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS alarm_events (
+            id INTEGER PRIMARY KEY,
+            alarm_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            at REAL NOT NULL,
+            duration REAL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alarm_events_kind_at ON alarm_events (kind, at, alarm_id, duration)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alarm_events_alarm_at ON alarm_events (alarm_id, at)")
+
+
+# Append new steps at the end; never reorder or edit a released step
+MIGRATIONS = [
+    (1, initial_schema),
+    (2, recurrence_columns),
+    (3, active_time_index),
+    (4, alarm_events),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Bring the database up to SCHEMA_VERSION and return the version it started at"""
+    start = schema_version(conn)
+    if start >= SCHEMA_VERSION:
+        # Fast path: one header read when the schema is current
+        return start
+    for version, step in MIGRATIONS:
+        if version <= start:
+            continue
+        # Explicit BEGIN so DDL is covered too; sqlite3 only opens implicit
+        # transactions for DML
+        conn.execute("BEGIN")
+        try:
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return start
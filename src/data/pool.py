@@ -0,0 +1,50 @@
+import sqlite3
+import threading
+
+# Applied to every connection. WAL lets readers proceed while a writer
+# commits; synchronous=NORMAL is durable across application crashes in WAL
+# mode and skips the per-commit fsync of the main database file.
+PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -8000",  # KiB, i.e. 8 MiB per connection
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+class ConnectionPool:
+    """Hands out one tuned sqlite connection per thread.
+
+    The scheduler thread, the Tk thread and the write-behind writer each get
+    their own connection, so reads never queue behind another thread's
+    cursor. Connections are created lazily and closed together by ``close``.
+    """
+
+    def __init__(self, path, timeout=5.0):
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        # journal_mode is persistent in the file, so set it once up front
+        conn = self.connection()
+        conn.execute("PRAGMA journal_mode = WAL")
+
+    def connection(self):
+        """Return the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Close every connection handed out by the pool"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
@@ -0,0 +1,118 @@
+import collections
+import logging
+
+from src.utils.volume_ramp import CURVES
+
+# key -> (type, default, minimum, maximum). Values are stored as text in
+# the settings table.
+SETTINGS = {
+    "dark_mode": (bool, False, None, None),
+    "snooze_minutes": (int, 5, 1, 24 * 60),
+    "default_sound": (str, "default_alarm.wav", None, None),
+    # Seconds the volume takes to climb to full, 0 to start at full volume
+    "volume_ramp_seconds": (float, 20.0, 0, None),
+    "volume_ramp_start": (float, 0.1, 0, 1),
+    # One of src.utils.volume_ramp.CURVES
+    "volume_ramp_curve": (str, "linear", None, None),
+    # Rewrite chosen sounds to a common peak level
+    "normalize_sounds": (bool, False, None, None),
+    # Files larger than this are streamed from disk instead of decoded into memory
+    "stream_threshold_mb": (float, 8.0, 0, None),
+    # p99 of deadline-to-audio lateness to stay under, see src.core.latency
+    "fire_latency_slo_ms": (float, 250.0, 1, None),
+    # Seconds before a deadline its sound is loaded and its dialog built, 0 to
+    # do it all at fire time; at most PRELOAD_LEAD in src.utils.sound_cache
+    "prepare_lead_seconds": (float, 30.0, 0, 300),
+}
+
+# key -> the only values a text setting accepts
+CHOICES = {
+    "volume_ramp_curve": tuple(CURVES),
+}
+
+logger = logging.getLogger("alarmclock")
+
+
+def _decode(kind, text):
+    if kind is bool:
+        return text in ("1", "true", "True")
+    return kind(text)
+
+
+def _encode(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value)
+
+
+class Settings:
+    """Typed preferences backed by the settings table.
+
+    The table is read once in ``__init__``; afterwards ``get`` is a dict
+    lookup and never touches sqlite. ``set`` and ``update`` change the cache
+    right away and hand the rows to the database's write-behind writer, so a
+    burst of changes lands in one commit. Listeners run on the thread that
+    made the change, after the cache is updated.
+
+    Without a database the settings live in memory only, starting from the
+    defaults.
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self._values = {key: spec[1] for key, spec in SETTINGS.items()}
+        self._listeners = collections.defaultdict(list)
+        if db is None:
+            return
+        for key, text in db.conn.execute("SELECT key, value FROM settings"):
+            if key not in SETTINGS:
+                continue
+            try:
+                self._values[key] = self._coerce(key, text)
+            except ValueError:
+                logger.warning("Ignoring invalid stored setting %s=%r", key, text)
+
+    def get(self, key):
+        """Current value of a setting; KeyError for unknown keys"""
+        return self._values[key]
+
+    __getitem__ = get
+
+    def set(self, key, value):
+        """Change one setting"""
+        self.update({key: value})
+
+    def update(self, values):
+        """Change several settings at once and notify their listeners"""
+        changed = {}
+        for key, value in values.items():
+            value = self._coerce(key, value)
+            if self._values[key] != value:
+                changed[key] = value
+        self._values.update(changed)
+        if self.db is not None:
+            for key, value in changed.items():
+                self.db.writer.submit("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                                      (key, _encode(value)))
+        for key, value in changed.items():
+            for listener in self._listeners[key]:
+                listener(key, value)
+
+    def subscribe(self, key, listener):
+        """Call ``listener(key, value)`` whenever ``key`` changes"""
+        if key not in SETTINGS:
+            raise KeyError(key)
+        self._listeners[key].append(listener)
+
+    def _coerce(self, key, value):
+        if key not in SETTINGS:
+            raise KeyError(key)
+        kind, _, low, high = SETTINGS[key]
+        if isinstance(value, str) and kind is not str:
+            value = _decode(kind, value)
+        value = kind(value)
+        if (low is not None and value < low) or (high is not None and value > high):
+            raise ValueError(f"{key} must be between {low} and {high}")
+        if key in CHOICES and value not in CHOICES[key]:
+            raise ValueError(f"{key} must be one of {', '.join(CHOICES[key])}")
+        return value
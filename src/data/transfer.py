@@ -0,0 +1,413 @@
+"""Bulk alarm import and export in CSV, JSON lines and iCalendar.
+
+Files are read and written as streams: records are parsed one at a time,
+validated in batches of ``batch_size`` and each valid batch is inserted
+with ``executemany`` in its own transaction. Memory use does not depend
+on the file size.
+
+    python -m src.data.transfer import alarms.csv
+    python -m src.data.transfer export backup.ics
+
+CSV and JSON lines use the database columns as field names: ``time``
+("HH:MM"), ``sound_path``, ``note``, ``repeat_rule`` (weekdays, interval
+or monthly), ``repeat_value`` and ``repeat_anchor`` (ISO date). A repeat
+never rings before its anchor. A one-shot alarm rings at the next
+occurrence of its time, so a record without a repeat_rule may only carry
+an anchor that is that day. iCalendar files carry one VEVENT per alarm.
+DTSTART gives the time and the anchor, RRULE the repeat, SUMMARY the
+note, and a VALARM's ATTACH the sound. When a UTC DTSTART or a relative
+TRIGGER puts the ring time on another local day, the anchor and the
+RRULE's BYDAY and BYMONTHDAY move with it.
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import re
+import sys
+
+from src.core.alarm import format_time, parse_time
+from src.core.recurrence import Recurrence, WEEKDAYS, INTERVAL, MONTHLY
+from src.core.scheduler import next_fire_time
+from src.data.database import DB_PATH, Database
+
+FIELDS = ("time", "sound_path", "note", "repeat_rule", "repeat_value", "repeat_anchor")
+DEFAULT_SOUND = "default_alarm.wav"
+# Rejected records beyond this many are counted but not kept
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = ("csv", "jsonl", "ics")
+_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl", ".ics": "ics"}
+
+ICAL_DAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+_DURATION = re.compile(r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+
+class ImportResult:
+    """Counts of an import plus the first few rejected records"""
+
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def detect_format(path):
+    """Guess the file format from its extension"""
+    fmt = _EXTENSIONS.get(os.path.splitext(str(path))[1].lower())
+    if fmt is None:
+        raise ValueError(f"Can't tell the format of {path}; pass one of {', '.join(FORMATS)}")
+    return fmt
+
+
+def to_row(record):
+    """Validate one record and return its alarms table row.
+
+    Raises ValueError with a readable message for anything the scheduler
+    couldn't load later.
+    """
+    try:
+        minute = parse_time(str(record.get("time") or ""))
+    except ValueError:
+        raise ValueError(f"invalid time {record.get('time')!r}") from None
+    time_str = format_time(minute)
+    anchor = record.get("repeat_anchor") or None
+    if anchor:
+        try:
+            anchor = datetime.date.fromisoformat(str(anchor))
+        except ValueError:
+            raise ValueError(f"invalid repeat_anchor {record.get('repeat_anchor')!r}") from None
+    kind = record.get("repeat_rule") or None
+    if kind:
+        try:
+            value = int(record.get("repeat_value"))
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid repeat_value {record.get('repeat_value')!r}") from None
+        repeat = Recurrence(kind, value, anchor).to_columns()
+    else:
+        if anchor:
+            next_day = datetime.date.fromtimestamp(next_fire_time(minute))
+            if anchor != next_day:
+                raise ValueError(f"one-shot alarm on {anchor} can't be kept: it would ring at "
+                                 f"the next {time_str}, on {next_day}")
+        repeat = (None, None, None)
+    return (time_str, str(record.get("sound_path") or DEFAULT_SOUND), str(record.get("note") or ""),
+            True) + repeat
+
+
+def import_alarms(db, path, fmt=None, batch_size=5000):
+    """Stream alarms from a file into the database and return an ImportResult"""
+    reader = READERS[fmt or detect_format(path)]
+    result = ImportResult()
+    with open(path, newline="", encoding="utf-8") as f:
+        batch = []
+        for item in reader(f):
+            batch.append(item)
+            if len(batch) >= batch_size:
+                _import_batch(db, batch, result)
+                batch = []
+        if batch:
+            _import_batch(db, batch, result)
+    return result
+
+
+def _import_batch(db, batch, result):
+    rows = []
+    for line, record in batch:
+        if isinstance(record, Exception):
+            result.reject(line, str(record))
+            continue
+        try:
+            rows.append(to_row(record))
+        except ValueError as e:
+            result.reject(line, str(e))
+    if rows:
+        result.imported += db.insert_alarms(rows)
+
+
+def export_alarms(db, path, fmt=None):
+    """Stream every active alarm to a file and return how many were written"""
+    writer = WRITERS[fmt or detect_format(path)]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        return writer(f, db.iter_alarms(page_size=5000))
+
+
+def _record(alarm):
+    kind, value, anchor = alarm.rule.to_columns() if alarm.rule else ("", "", "")
+    return {"time": alarm.time, "sound_path": alarm.sound_path or "", "note": alarm.note,
+            "repeat_rule": kind, "repeat_value": value, "repeat_anchor": anchor}
+
+
+# CSV
+
+def read_csv(f):
+    """Yield (line, record) pairs from a CSV file with a header row"""
+    reader = csv.DictReader(f)
+    missing = {"time"} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError("CSV header must include a time column")
+    for record in reader:
+        yield reader.line_num, record
+
+
+def write_csv(f, alarms):
+    writer = csv.DictWriter(f, fieldnames=FIELDS)
+    writer.writeheader()
+    count = 0
+    for alarm in alarms:
+        writer.writerow(_record(alarm))
+        count += 1
+    return count
+
+
+# JSON lines
+
+def read_jsonl(f):
+    """Yield (line, record) pairs from a file with one JSON object per line"""
+    for line, text in enumerate(f, 1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as e:
+            yield line, ValueError(f"invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield line, ValueError("expected a JSON object")
+            continue
+        yield line, record
+
+
+def write_jsonl(f, alarms):
+    count = 0
+    for alarm in alarms:
+        f.write(json.dumps(_record(alarm)) + "\n")
+        count += 1
+    return count
+
+
+# iCalendar
+
+def _unfold(f):
+    """Yield (line number, logical line) with RFC 5545 continuation lines joined"""
+    pending, start = None, 0
+    for number, text in enumerate(f, 1):
+        text = text.rstrip("\r\n")
+        if text[:1] in (" ", "\t") and pending is not None:
+            pending += text[1:]
+            continue
+        if pending is not None:
+            yield start, pending
+        pending, start = text, number
+    if pending is not None:
+        yield start, pending
+
+
+def _unescape(value):
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _escape(value):
+    return (value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\n", "\\n"))
+
+
+def _parse_duration(value):
+    match = _DURATION.match(value)
+    if not match or value in ("P", "-P", "+P"):
+        raise ValueError(f"invalid TRIGGER {value!r}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = datetime.timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                               minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -delta if sign == "-" else delta
+
+
+def _parse_rrule(value, start, shift=0):
+    """Repeat columns for an RRULE starting on ``start``.
+
+    ``shift`` is how many days converting the start to a local ring time
+    moved it; BYDAY and BYMONTHDAY move with it.
+    """
+    parts = dict(part.split("=", 1) for part in value.split(";") if "=" in part)
+    freq = parts.get("FREQ")
+    if "COUNT" in parts or "UNTIL" in parts:
+        raise ValueError("RRULE with COUNT or UNTIL is not supported")
+    interval = int(parts.get("INTERVAL", 1))
+    if freq == "DAILY":
+        return {"repeat_rule": INTERVAL, "repeat_value": interval}
+    if freq == "WEEKLY" and interval == 1:
+        if "BYDAY" not in parts:
+            return {"repeat_rule": WEEKDAYS, "repeat_value": 1 << start.weekday()}
+        try:
+            mask = sum(1 << (ICAL_DAYS.index(day.strip()) + shift) % 7
+                       for day in set(parts["BYDAY"].split(",")))
+        except ValueError:
+            raise ValueError(f"invalid BYDAY {parts['BYDAY']!r}") from None
+        return {"repeat_rule": WEEKDAYS, "repeat_value": mask}
+    if freq == "MONTHLY" and interval == 1:
+        if "BYMONTHDAY" not in parts:
+            return {"repeat_rule": MONTHLY, "repeat_value": start.day}
+        if not shift:
+            return {"repeat_rule": MONTHLY, "repeat_value": parts["BYMONTHDAY"]}
+        try:
+            day = int(parts["BYMONTHDAY"]) + shift
+        except ValueError:
+            raise ValueError(f"invalid BYMONTHDAY {parts['BYMONTHDAY']!r}") from None
+        if not 1 <= day <= 31:
+            raise ValueError(f"BYMONTHDAY {parts['BYMONTHDAY']} moves into another month "
+                             f"at local time {start.isoformat()}")
+        return {"repeat_rule": MONTHLY, "repeat_value": day}
+    raise ValueError(f"unsupported RRULE {value!r}")
+
+
+def _event_record(props, alarm_props):
+    """Turn the properties of one VEVENT (and its first VALARM) into a record"""
+    if "DTSTART" not in props:
+        raise ValueError("VEVENT without DTSTART")
+    value = props["DTSTART"]
+    try:
+        if "T" in value:
+            start = datetime.datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+        else:
+            start = datetime.datetime.strptime(value[:8], "%Y%m%d")
+    except ValueError:
+        raise ValueError(f"invalid DTSTART {value!r}") from None
+    written = start.date()
+    if value.endswith("Z"):
+        # UTC; alarms ring at local wall-clock times
+        start = start.replace(tzinfo=datetime.timezone.utc).astimezone().replace(tzinfo=None)
+    trigger = alarm_props.get("TRIGGER")
+    if trigger and not trigger[:1].isdigit():
+        # Relative trigger: ring that long before (or after) the event start
+        start += _parse_duration(trigger)
+    record = {"time": start.strftime("%H:%M"),
+              # The first ring; a one-off event must be the next occurrence of its time
+              "repeat_anchor": start.date().isoformat(),
+              "note": _unescape(props.get("SUMMARY") or props.get("DESCRIPTION") or "")}
+    attach = alarm_props.get("ATTACH", "")
+    record["sound_path"] = attach[len("file://"):] if attach.startswith("file://") else attach
+    if "RRULE" in props:
+        # The rule's days are in the event's own date, which may differ from the ring date
+        record.update(_parse_rrule(props["RRULE"], start.date(), (start.date() - written).days))
+    return record
+
+
+def read_ics(f):
+    """Yield (line, record) pairs, one per VEVENT"""
+    props = alarm_props = None
+    in_alarm = False
+    start = 0
+    for line, text in _unfold(f):
+        name, _, value = text.partition(":")
+        name = name.split(";", 1)[0].upper()
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            props, alarm_props, start = {}, {}, line
+        elif props is None:
+            continue
+        elif name == "BEGIN" and value.upper() == "VALARM":
+            in_alarm = True
+        elif name == "END" and value.upper() == "VALARM":
+            in_alarm = False
+        elif name == "END" and value.upper() == "VEVENT":
+            try:
+                yield start, _event_record(props, alarm_props)
+            except ValueError as e:
+                yield start, e
+            props = None
+        elif in_alarm:
+            alarm_props.setdefault(name, value)
+        else:
+            props.setdefault(name, value)
+
+
+def _fold(line):
+    # Content lines are limited to 75 octets; continuations start with a space
+    chunks = []
+    limit = 75
+    while len(line.encode("utf-8")) > limit:
+        cut = limit
+        while len(line[:cut].encode("utf-8")) > limit:
+            cut -= 1
+        chunks.append(line[:cut])
+        line = line[cut:]
+        limit = 74
+    chunks.append(line)
+    return "\r\n ".join(chunks) + "\r\n"
+
+
+def _rrule(rule):
+    if rule.kind == WEEKDAYS:
+        days = ",".join(day for bit, day in enumerate(ICAL_DAYS) if rule.value & (1 << bit))
+        return f"FREQ=WEEKLY;BYDAY={days}"
+    if rule.kind == INTERVAL:
+        return f"FREQ=DAILY;INTERVAL={rule.value}"
+    return f"FREQ=MONTHLY;BYMONTHDAY={rule.value}"
+
+
+def write_ics(f, alarms):
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Smart Alarm Clock//EN\r\n")
+    count = 0
+    for alarm in alarms:
+        if alarm.rule:
+            # Interval rules count from the anchor, so the series must start there
+            day = alarm.rule.next_date(alarm.rule.anchor)
+        else:
+            day = datetime.date.fromtimestamp(next_fire_time(alarm.minute))
+        lines = ["BEGIN:VEVENT",
+                 f"UID:alarm-{alarm.id}@smart-alarm-clock",
+                 f"DTSTAMP:{stamp}",
+                 f"DTSTART:{day:%Y%m%d}T{alarm.time.replace(':', '')}00",
+                 f"SUMMARY:{_escape(alarm.note)}"]
+        if alarm.rule:
+            lines.append(f"RRULE:{_rrule(alarm.rule)}")
+        lines += ["BEGIN:VALARM", "ACTION:AUDIO", "TRIGGER:PT0S"]
+        if alarm.sound_path:
+            lines.append(f"ATTACH:{alarm.sound_path}")
+        lines += ["END:VALARM", "END:VEVENT"]
+        f.write("".join(_fold(line) for line in lines))
+        count += 1
+    f.write("END:VCALENDAR\r\n")
+    return count
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "ics": read_ics}
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "ics": write_ics}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export alarms in bulk")
+    parser.add_argument("action", choices=("import", "export"))
+    parser.add_argument("path", help="file to read or write")
+    parser.add_argument("--format", choices=FORMATS, help="file format (default: from the extension)")
+    parser.add_argument("--db", help="database file (default: src/data/alarms.db)")
+    parser.add_argument("--batch-size", type=int, default=5000,
+                        help="records validated and committed together on import")
+    args = parser.parse_args(argv)
+
+    db = Database(args.db or DB_PATH)
+    try:
+        if args.action == "import":
+            result = import_alarms(db, args.path, args.format, args.batch_size)
+            print(f"Imported {result.imported} alarms, rejected {result.rejected}")
+            for line, message in result.errors:
+                print(f"  line {line}: {message}", file=sys.stderr)
+            if result.rejected > len(result.errors):
+                print(f"  ... and {result.rejected - len(result.errors)} more", file=sys.stderr)
+        else:
+            count = export_alarms(db, args.path, args.format)
+            print(f"Exported {count} alarms")
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"{parser.prog}: error: {e}\n")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
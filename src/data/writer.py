@@ -0,0 +1,114 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+_STOP = object()
+
+
+class WriteBehindWriter:
+    """Background thread that owns a write connection and group-commits.
+
+    Callers queue statements with ``submit`` and get a Future back instead of
+    waiting for a commit. The writer collects statements until the flush
+    window closes or ``max_batch`` is reached and commits them in a single
+    transaction, so a burst of edits costs one fsync instead of one per row.
+    ``flush`` blocks until everything queued so far is durably committed.
+
+    ``connect`` is called on the writer thread to obtain its connection.
+    """
+
+    def __init__(self, connect, flush_interval=0.05, max_batch=500):
+        self.connect = connect
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, params=(), flush=False):
+        """Queue one statement; the Future resolves to its cursor's (lastrowid, rowcount).
+
+        With ``flush`` the current window closes right after this statement,
+        for callers that are about to wait on the result.
+        """
+        future = Future()
+        self._queue.put((sql, params, future))
+        if flush:
+            self._queue.put((None, None, Future()))
+        return future
+
+    def flush(self, timeout=None):
+        """Commit everything queued so far and wait for it"""
+        future = Future()
+        self._queue.put((None, None, future))
+        return future.result(timeout)
+
+    def close(self):
+        """Flush pending writes and stop the writer thread"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        conn = self.connect()
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            # A flush marker closes the window early
+            while len(batch) < self.max_batch and batch[-1][0] is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+        # Drain anything that raced in behind the stop marker
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            self._commit(conn, leftover)
+
+    def _commit(self, conn, batch):
+        """Run a batch in one transaction, falling back to one per statement on error"""
+        results = []
+        try:
+            with conn:
+                for sql, params, _ in batch:
+                    if sql is None:
+                        results.append(None)
+                        continue
+                    cursor = conn.execute(sql, params)
+                    results.append((cursor.lastrowid, cursor.rowcount))
+        except sqlite3.Error:
+            # Isolate the failing statement so the rest of the batch still lands
+            for sql, params, future in batch:
+                if sql is None:
+                    future.set_result(None)
+                    continue
+                try:
+                    with conn:
+                        cursor = conn.execute(sql, params)
+                    future.set_result((cursor.lastrowid, cursor.rowcount))
+                except sqlite3.Error as e:
+                    future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
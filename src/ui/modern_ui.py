@@ -1,11 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from datetime import datetime
 import os
 from tkcalendar import Calendar
 from PIL import Image, ImageTk
 import customtkinter as ctk
+from src.core.alarm import Alarm, parse_time
+from src.core.recurrence import Recurrence, WEEKDAYS, INTERVAL, MONTHLY, WORKDAY_MASK
 from src.ui.git_control_panel import GitControlPanel
+from src.utils.channel_pool import PRIORITY_TIMER
+from src.utils.constants import COLORS
+from src.utils.volume_ramp import CURVES
+
+# Alarms shown per page of the alarm list
+ALARM_PAGE_SIZE = 50
 
 class ModernAlarmClockUI:
     def __init__(self, root, app):
@@ -14,6 +21,8 @@ class ModernAlarmClockUI:
         self.setup_window()
         self.create_styles()
         self.create_main_layout()
+        self.apply_theme()
+        self.app.settings.subscribe("dark_mode", lambda key, value: self.apply_theme())
         
     def setup_window(self):
         """Configure the main window"""
@@ -88,17 +97,20 @@ class ModernAlarmClockUI:
         self.timer_tab = ttk.Frame(self.notebook)
         self.stopwatch_tab = ttk.Frame(self.notebook)
         self.git_tab = ttk.Frame(self.notebook)
+        self.settings_tab = ttk.Frame(self.notebook)
         
         self.notebook.add(self.alarm_tab, text="Alarms")
         self.notebook.add(self.timer_tab, text="Timer")
         self.notebook.add(self.stopwatch_tab, text="Stopwatch")
         self.notebook.add(self.git_tab, text="Git Control")
+        self.notebook.add(self.settings_tab, text="Settings")
         
         # Setup each tab
         self.setup_alarm_tab()
         self.setup_timer_tab()
         self.setup_stopwatch_tab()
         self.setup_git_tab()
+        self.setup_settings_tab()
         
     def setup_alarm_tab(self):
         """Setup the alarm tab with modern design"""
@@ -131,6 +143,21 @@ class ModernAlarmClockUI:
         self.minute_spinbox = ttk.Spinbox(minute_frame, from_=0, to=59, width=3, format="%02.0f")
         self.minute_spinbox.pack()
         
+        # Repeat selection
+        repeat_frame = ttk.Frame(left_panel, style="Modern.TFrame")
+        repeat_frame.pack(fill=tk.X, pady=10)
+        ttk.Label(repeat_frame, text="Repeat", style="Modern.TLabel").pack(anchor=tk.W)
+        self.repeat_var = tk.StringVar(value="Never")
+        repeat_combo = ttk.Combobox(repeat_frame,
+                                    textvariable=self.repeat_var,
+                                    values=["Never", "Weekdays", "Every N days", "Monthly on day"],
+                                    state="readonly",
+                                    width=15)
+        repeat_combo.pack(side=tk.LEFT, padx=5)
+        self.repeat_value_spinbox = ttk.Spinbox(repeat_frame, from_=1, to=31, width=3)
+        self.repeat_value_spinbox.set("1")
+        self.repeat_value_spinbox.pack(side=tk.LEFT, padx=5)
+        
         # Sound selection
         sound_frame = ttk.Frame(left_panel, style="Modern.TFrame")
         sound_frame.pack(fill=tk.X, pady=10)
@@ -139,13 +166,18 @@ class ModernAlarmClockUI:
         sound_button_frame = ttk.Frame(sound_frame, style="Modern.TFrame")
         sound_button_frame.pack(fill=tk.X)
         
-        self.sound_path = tk.StringVar(value="default_alarm.wav")
+        self.sound_path = tk.StringVar(value=self.app.settings.get("default_sound"))
         browse_button = ttk.Button(sound_button_frame,
                                  text="Browse Sound",
                                  style="Modern.TButton",
                                  command=self.browse_sound)
         browse_button.pack(side=tk.LEFT, padx=5)
         
+        # Result of the background sound check for the chosen file
+        self.sound_check = None
+        self.sound_status = ttk.Label(sound_frame, text="", style="Modern.TLabel")
+        self.sound_status.pack(anchor=tk.W)
+        
         # Note input
         note_frame = ttk.Frame(left_panel, style="Modern.TFrame")
         note_frame.pack(fill=tk.X, pady=10)
@@ -182,6 +214,22 @@ class ModernAlarmClockUI:
         )
         self.alarm_listbox.pack(fill=tk.BOTH, expand=True, pady=5)
         
+        # Paging controls; only the visible page is ever read from the database
+        paging_frame = ttk.Frame(right_panel, style="Modern.TFrame")
+        paging_frame.pack(fill=tk.X)
+        self.prev_page_button = ttk.Button(paging_frame,
+                                         text="< Prev",
+                                         style="Modern.TButton",
+                                         command=self.prev_alarm_page)
+        self.prev_page_button.pack(side=tk.LEFT)
+        self.next_page_button = ttk.Button(paging_frame,
+                                         text="Next >",
+                                         style="Modern.TButton",
+                                         command=self.next_alarm_page)
+        self.next_page_button.pack(side=tk.RIGHT)
+        self.page_label = ttk.Label(paging_frame, text="", style="Modern.TLabel")
+        self.page_label.pack()
+        
         # Delete button
         delete_button = ttk.Button(right_panel,
                                  text="Delete Selected Alarm",
@@ -189,6 +237,11 @@ class ModernAlarmClockUI:
                                  command=self.delete_alarm)
         delete_button.pack(pady=10)
         
+        # Keyset of the first alarm on each page visited so far
+        self.page_starts = [None]
+        self.visible_alarms = []
+        self.update_alarm_listbox()
+        
     def setup_timer_tab(self):
         """Setup the timer tab with modern design"""
         main_frame = ttk.Frame(self.timer_tab, style="Modern.TFrame")
@@ -312,6 +365,84 @@ class ModernAlarmClockUI:
         )
         update_button.pack(pady=10)
         
+    def setup_settings_tab(self):
+        """Setup the preferences tab"""
+        settings = self.app.settings
+        main_frame = ttk.Frame(self.settings_tab, style="Modern.TFrame")
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        ttk.Label(main_frame,
+                 text="Settings",
+                 style="Title.TLabel").grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 20))
+        
+        self.dark_mode_var = tk.BooleanVar(value=settings.get("dark_mode"))
+        ttk.Checkbutton(main_frame,
+                        text="Dark mode",
+                        variable=self.dark_mode_var).grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        ttk.Label(main_frame, text="Snooze (minutes)", style="Modern.TLabel").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.snooze_spinbox = ttk.Spinbox(main_frame, from_=1, to=60, width=5)
+        self.snooze_spinbox.set(settings.get("snooze_minutes"))
+        self.snooze_spinbox.grid(row=2, column=1, sticky=tk.W, padx=5)
+        
+        ttk.Label(main_frame, text="Volume ramp (seconds)", style="Modern.TLabel").grid(row=3, column=0, sticky=tk.W, pady=5)
+        self.ramp_spinbox = ttk.Spinbox(main_frame, from_=0, to=300, width=5)
+        self.ramp_spinbox.set(f"{settings.get('volume_ramp_seconds'):g}")
+        self.ramp_spinbox.grid(row=3, column=1, sticky=tk.W, padx=5)
+        
+        ttk.Label(main_frame, text="Volume ramp curve", style="Modern.TLabel").grid(row=4, column=0, sticky=tk.W, pady=5)
+        self.ramp_curve_var = tk.StringVar(value=settings.get("volume_ramp_curve"))
+        ttk.Combobox(main_frame,
+                     textvariable=self.ramp_curve_var,
+                     values=list(CURVES),
+                     state="readonly",
+                     width=12).grid(row=4, column=1, sticky=tk.W, padx=5)
+        
+        ttk.Label(main_frame, text="Default sound", style="Modern.TLabel").grid(row=5, column=0, sticky=tk.W, pady=5)
+        self.default_sound_entry = ttk.Entry(main_frame, font=("Helvetica", 12), width=30)
+        self.default_sound_entry.insert(0, settings.get("default_sound"))
+        self.default_sound_entry.grid(row=5, column=1, sticky=tk.W, padx=5)
+        
+        ttk.Label(main_frame, text="Stream sounds over (MB)", style="Modern.TLabel").grid(row=6, column=0, sticky=tk.W, pady=5)
+        self.stream_threshold_spinbox = ttk.Spinbox(main_frame, from_=0, to=1024, width=5)
+        self.stream_threshold_spinbox.set(f"{settings.get('stream_threshold_mb'):g}")
+        self.stream_threshold_spinbox.grid(row=6, column=1, sticky=tk.W, padx=5)
+        
+        ttk.Label(main_frame, text="Prepare alarms ahead (s)", style="Modern.TLabel").grid(row=7, column=0, sticky=tk.W, pady=5)
+        self.prepare_lead_spinbox = ttk.Spinbox(main_frame, from_=0, to=300, increment=5, width=5)
+        self.prepare_lead_spinbox.set(f"{settings.get('prepare_lead_seconds'):g}")
+        self.prepare_lead_spinbox.grid(row=7, column=1, sticky=tk.W, padx=5)
+        
+        ttk.Button(main_frame,
+                  text="Save Settings",
+                  style="Modern.TButton",
+                  command=self.save_settings).grid(row=8, column=0, columnspan=2, sticky=tk.W, pady=20)
+        
+    def save_settings(self):
+        """Store the values from the settings tab"""
+        try:
+            self.app.settings.update({
+                "dark_mode": self.dark_mode_var.get(),
+                "snooze_minutes": self.snooze_spinbox.get(),
+                "volume_ramp_seconds": self.ramp_spinbox.get(),
+                "volume_ramp_curve": self.ramp_curve_var.get(),
+                "default_sound": self.default_sound_entry.get().strip() or "default_alarm.wav",
+                "stream_threshold_mb": self.stream_threshold_spinbox.get(),
+                "prepare_lead_seconds": self.prepare_lead_spinbox.get(),
+            })
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid setting: {e}")
+            return
+        messagebox.showinfo("Success", "Settings saved!")
+        
+    def apply_theme(self):
+        """Recolor the UI for the current dark mode setting"""
+        theme = COLORS['dark' if self.app.settings.get("dark_mode") else 'light']
+        self.style.configure("Modern.TFrame", background=theme['tab_bg'])
+        self.style.configure("Modern.TLabel", background=theme['tab_bg'], foreground=theme['fg'])
+        self.style.configure("Title.TLabel", background=theme['tab_bg'], foreground=theme['fg'])
+        self.alarm_listbox.configure(bg=theme['listbox_bg'], fg=theme['listbox_fg'])
+        
     def browse_sound(self):
         """Open file dialog to select alarm sound"""
         try:
@@ -330,42 +461,112 @@ class ModernAlarmClockUI:
             
             if file and os.path.exists(file):
                 self.sound_path.set(file)
+                # Decode once now so problems show up here rather than when the alarm fires
+                self.sound_check = self.app.audio.library.submit(file)
+                self.sound_status.config(text=f"Checking {os.path.basename(file)}...")
+                self.root.after(100, self.show_sound_check, self.sound_check)
         except Exception as e:
             messagebox.showerror("Error", f"Could not open file dialog: {str(e)}")
             
+    def show_sound_check(self, check):
+        """Show the outcome of a sound check once it finishes"""
+        if check is not self.sound_check:
+            return
+        if not check.done():
+            self.root.after(100, self.show_sound_check, check)
+            return
+        try:
+            text = check.result().describe()
+        except Exception as e:
+            text = f"Could not check sound: {e}"
+        self.sound_status.config(text=f"{os.path.basename(self.sound_path.get())}: {text}")
+        
     def set_alarm(self):
         """Set a new alarm"""
         try:
             hour = int(self.hour_spinbox.get())
             minute = int(self.minute_spinbox.get())
             time_str = f"{hour:02d}:{minute:02d}"
-            datetime.strptime(time_str, "%H:%M")
+            minute_of_day = parse_time(time_str)
         except ValueError:
             messagebox.showerror("Error", "Invalid time format. Use 24-hour format (00-23:00-59).")
             return
             
+        try:
+            rule = self.get_repeat_rule()
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid repeat: {e}")
+            return
+            
         sound_path = self.sound_path.get()
         note = self.note_entry.get()
-        
-        self.app.db.save_alarm(time_str, sound_path, note)
-        self.app.alarms.append({"time": time_str, "sound_path": sound_path, "note": note})
+        if self.sound_check is not None and self.sound_check.done() and not self.sound_check.exception():
+            info = self.sound_check.result()
+            if not info.ok:
+                messagebox.showerror("Error", f"Can't use this sound: {info.error}")
+                return
+        
+        alarm_id = self.app.db.save_alarm(time_str, sound_path, note, rule=rule)
+        self.app.add_alarm(Alarm(alarm_id, minute_of_day, sound_path, note, rule=rule))
         self.update_alarm_listbox()
         
         # Reset inputs
         self.hour_spinbox.set("00")
         self.minute_spinbox.set("00")
         self.note_entry.delete(0, tk.END)
-        self.sound_path.set("default_alarm.wav")
+        self.sound_path.set(self.app.settings.get("default_sound"))
+        self.sound_check = None
+        self.sound_status.config(text="")
+        self.repeat_var.set("Never")
+        self.repeat_value_spinbox.set("1")
         
         messagebox.showinfo("Success", "Alarm set successfully!")
         
+    def get_repeat_rule(self):
+        """Build the recurrence rule selected in the repeat controls"""
+        choice = self.repeat_var.get()
+        if choice == "Weekdays":
+            return Recurrence(WEEKDAYS, WORKDAY_MASK)
+        if choice == "Every N days":
+            return Recurrence(INTERVAL, int(self.repeat_value_spinbox.get()))
+        if choice == "Monthly on day":
+            return Recurrence(MONTHLY, int(self.repeat_value_spinbox.get()))
+        return None
+        
     def update_alarm_listbox(self):
-        """Update the alarm list display"""
+        """Update the alarm list display with the current page"""
+        # Show the edit that triggered this refresh
+        self.app.db.flush()
+        # One extra row tells whether a next page exists
+        page = self.app.db.load_alarm_page(self.page_starts[-1], ALARM_PAGE_SIZE + 1)
+        if not page and len(self.page_starts) > 1:
+            # The last alarm on this page was removed; fall back a page
+            self.page_starts.pop()
+            self.update_alarm_listbox()
+            return
+        self.visible_alarms = page[:ALARM_PAGE_SIZE]
         self.alarm_listbox.delete(0, tk.END)
-        for alarm in self.app.alarms:
-            display_text = f"{alarm['time']} - {alarm['note']}" if alarm['note'] else f"{alarm['time']}"
-            self.alarm_listbox.insert(tk.END, display_text)
+        for alarm in self.visible_alarms:
+            self.alarm_listbox.insert(tk.END, alarm.describe())
+        self.prev_page_button.state(["!disabled"] if len(self.page_starts) > 1 else ["disabled"])
+        self.next_page_button.state(["!disabled"] if len(page) > ALARM_PAGE_SIZE else ["disabled"])
+        self.page_label.config(text=f"Page {len(self.page_starts)}")
             
+    def next_alarm_page(self):
+        """Show the page after the visible one"""
+        if len(self.visible_alarms) < ALARM_PAGE_SIZE:
+            return
+        last = self.visible_alarms[-1]
+        self.page_starts.append((last.time, last.id))
+        self.update_alarm_listbox()
+        
+    def prev_alarm_page(self):
+        """Show the page before the visible one"""
+        if len(self.page_starts) > 1:
+            self.page_starts.pop()
+            self.update_alarm_listbox()
+            
+
     def delete_alarm(self):
         """Delete selected alarm"""
         selection = self.alarm_listbox.curselection()
@@ -373,10 +574,9 @@ class ModernAlarmClockUI:
             messagebox.showerror("Error", "Select an alarm to delete.")
             return
             
-        index = selection[0]
-        alarm = self.app.alarms[index]
+        alarm = self.visible_alarms[selection[0]]
+        self.app.remove_alarm(alarm)
         self.app.db.delete_alarm(alarm)
-        self.app.alarms.pop(index)
         self.update_alarm_listbox()
         
     def start_timer(self):
@@ -411,8 +611,11 @@ class ModernAlarmClockUI:
         self.app.timer_running = False
         self.timer_start_button.config(state=tk.NORMAL)
         self.timer_stop_button.config(state=tk.DISABLED)
+        # Ring on a channel of its own so an alarm already going off keeps playing
+        handle = self.app.audio.play_alarm(self.app.settings.get("default_sound"), priority=PRIORITY_TIMER)
         messagebox.showinfo("Timer Complete", "Your timer has finished!")
-        self.app.audio.play_alarm("default_alarm.wav")
+        if handle:
+            self.app.audio.stop_alarm(handle)
         
     def start_stopwatch(self):
         """Start the stopwatch"""
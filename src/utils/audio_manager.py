@@ -1,39 +1,206 @@
-from pygame import mixer
-import time
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from src.data.settings import Settings
+from src.utils.channel_pool import ChannelPool, MAX_CHANNELS, PRIORITY_ALARM
+from src.utils.sound_cache import SoundCache
+from src.utils.sound_library import SoundLibrary
+from src.utils.streaming import Streamer, open_wav_stream
+from src.utils.volume_ramp import RampEngine
+
+# pygame.mixer, bound on the audio init thread; importing pygame is slow and
+# must stay off the path to the first window
+mixer = None
+
+# Seconds play_alarm waits for the mixer to come up before ringing silently
+READY_TIMEOUT = 2.0
+
+def import_mixer():
+    """Import pygame.mixer on first use and return it"""
+    global mixer
+    if mixer is None:
+        # Keep pygame's support banner off stdout
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        from pygame import mixer as pygame_mixer
+        mixer = pygame_mixer
+    return mixer
+
+def load_sound(sound_path):
+    """Decode a file into a mixer.Sound and return it with its decoded size in bytes"""
+    sound = mixer.Sound(sound_path)
+    frequency, sample_format, channels = mixer.get_init()
+    return sound, int(sound.get_length() * frequency) * channels * (abs(sample_format) // 8)
 
 class AudioManager:
-    def __init__(self):
-        mixer.init()
+    """Plays alarm sounds through pygame's mixer.
+
+    Nothing touches pygame until ``start``, which imports it and initializes
+    the mixer on a background thread. ``ready`` is a Future that resolves
+    once that is done; playing or preloading waits on it only if it hasn't
+    finished yet, and starts it if nobody has.
+
+    Each sound gets its own channel from ``channels``, a pool of at most
+    ``max_channels``, and ``play_alarm`` returns a PlaybackHandle for it, so
+    alarms and the timer can ring together and be stopped one by one.
+
+    Files up to the stream_threshold_mb setting are decoded into ``cache``.
+    Larger ones are streamed instead: WAVs in the mixer's format through a
+    memory map, a chunk at a time on a regular channel, anything else
+    through mixer.music, of which there is only one.
+    """
+
+    def __init__(self, settings=None, cache_bytes=64 * 2**20, max_channels=MAX_CHANNELS):
+        # Default sound and volume ramp are read per alarm, so changes apply to the next one
+        self.settings = settings or Settings()
+        self.ready = Future()
+        self._started = False
+        self._start_lock = threading.Lock()
+        # Decoded sounds, so firing doesn't wait on disk reads and decoding
+        self.cache = SoundCache(load_sound, cache_bytes)
+        # Checks chosen files ahead of time and maps them to canonical WAVs
+        self.library = SoundLibrary(self, self.settings)
+        self._preloader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sound-preload")
+        # Volume ramps run on their own control thread, so play_alarm never blocks
+        self.ramps = RampEngine()
+        # Feeds streamed files to their channels
+        self.streams = Streamer()
+        self.max_channels = max_channels
+        # Built once the mixer is up
+        self.channels = None
+
+    def start(self):
+        """Initialize the mixer on a background thread; later calls do nothing"""
+        with self._start_lock:
+            if self._started:
+                return self.ready
+            self._started = True
+        threading.Thread(target=self._init_mixer, name="audio-init", daemon=True).start()
+        return self.ready
+
+    def _init_mixer(self):
+        try:
+            import_mixer().init()
+            self.channels = ChannelPool(mixer, self.ramps, self.max_channels)
+        except BaseException as e:
+            self.ready.set_exception(e)
+        else:
+            self.ready.set_result(mixer)
 
-    def play_alarm(self, sound_path, gradual=False):
-        """Play an alarm sound"""
+    def wait_ready(self, timeout=None):
+        """Block until the mixer is initialized, starting it if needed"""
+        return self.start().result(timeout)
+
+    def prepare(self, sound_path):
+        """Check a newly chosen sound in the background, then decode it into the cache"""
+        future = self.library.submit(sound_path)
+        future.add_done_callback(lambda _: self.preload(sound_path))
+        return future
+
+    def preload(self, sound_path):
+        """Decode a sound in the background so the next play is a cache hit"""
+        return self._preloader.submit(self._preload, sound_path)
+
+    def _preload(self, sound_path):
+        # Wait for start rather than calling it; preloading alone must not
+        # pull pygame in before the window is up
+        self.ready.result()
+        # A missing file plays the default instead, so warm that
+        path = self.library.resolve(sound_path) or self.library.default_path()
+        return not self.library.streamed(path) and self.cache.preload(path)
+
+    def play_alarm(self, sound_path, gradual=False, curve=None, priority=PRIORITY_ALARM):
+        """Start a looping sound and return its PlaybackHandle, or None if it couldn't play.
+
+        ``gradual`` ramps the volume up in the background; ``curve``
+        overrides the volume_ramp_curve setting with a curve name, a
+        function of progress or a sequence of levels (see volume_ramp).
+        ``priority`` decides which sound gives up its channel when all of
+        them are in use. If the mixer isn't up within READY_TIMEOUT seconds
+        nothing plays, rather than holding up the caller.
+        """
         try:
-            # Check if file exists
-            if not os.path.exists(sound_path):
+            self.wait_ready(READY_TIMEOUT)
+            path = self.library.resolve(sound_path)
+            if path is None:
                 print(f"Sound file not found: {sound_path}")
-                sound_path = "default_alarm.wav"  # Fallback to default
-
-            mixer.music.load(sound_path)
-            mixer.music.set_volume(0.1 if gradual else 1.0)
-            mixer.music.play(-1)
-            if gradual:
-                for i in range(10, 101, 10):
-                    mixer.music.set_volume(i / 100)
-                    time.sleep(2)
+                path = self.library.default_path()  # Fallback to default
+
+            ramp_seconds = self.settings.get("volume_ramp_seconds") if gradual else 0
+            if not ramp_seconds:
+                return self._play_file(path, priority)
+            start_volume = self.settings.get("volume_ramp_start")
+            handle = self._play_file(path, priority, start_volume)
+            if handle is not None:
+                try:
+                    handle.fade(ramp_seconds, 1.0, start_volume,
+                                curve or self.settings.get("volume_ramp_curve"))
+                except Exception:
+                    # Nobody would own it once the fallback below starts
+                    handle.stop()
+                    raise
+            return handle
+        except TimeoutError:
+            print("Audio is still starting; ringing without sound")
+            return None
         except Exception as e:
             print(f"Error playing sound: {e}")
             # Try playing default alarm if custom sound fails
             try:
-                mixer.music.load("default_alarm.wav")
-                mixer.music.play(-1)
+                return self._play(self.cache.get(self.library.default_path()), priority)
             except:
                 print("Could not play default alarm sound")
 
-    def stop_alarm(self):
-        """Stop the current alarm sound"""
-        mixer.music.stop()
+    def _play_file(self, path, priority, volume=1.0):
+        if not self.library.streamed(path):
+            return self._play(self.cache.get(path), priority, volume)
+        stream = open_wav_stream(mixer, path)
+        if stream is None:
+            handle = self.channels.play_music(path, priority, volume=volume)
+            if handle is None:
+                print("Another large sound is already streaming; playing the default sound")
+                handle = self._play(self.cache.get(self.library.default_path()), priority, volume)
+            return handle
+        try:
+            handle = self._play(stream.next_chunk(), priority, volume, loops=0)
+        except BaseException:
+            stream.close()
+            raise
+        if handle is None:
+            stream.close()
+            return None
+        handle.stream = stream
+        self.streams.add(handle)
+        return handle
+
+    def _play(self, sound, priority, volume=1.0, loops=-1):
+        handle = self.channels.play(sound, priority, loops, volume)
+        if handle is None:
+            print(f"All {self.max_channels} channels are playing more important sounds")
+        return handle
+
+    def _mixer_ready(self):
+        return self.ready.done() and self.ready.exception() is None
+
+    def stop_alarm(self, handle=None):
+        """Stop one sound by its handle, or every sound and ramp when none is given"""
+        if handle is not None:
+            handle.stop()
+            return
+        self.ramps.cancel()
+        # Nothing can be playing before the mixer is up
+        if self._mixer_ready():
+            self.channels.stop_all()
 
     def quit(self):
         """Clean up audio resources"""
-        mixer.quit()
\ No newline at end of file
+        self._preloader.shutdown(wait=False)
+        self.library.close()
+        self.ramps.close()
+        self.streams.close()
+        if self._started:
+            try:
+                # Let an init still in flight finish so it can be shut down cleanly
+                self.ready.result(timeout=5)
+            except Exception:
+                return
+            mixer.quit()
\ No newline at end of file
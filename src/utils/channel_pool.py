@@ -0,0 +1,231 @@
+import itertools
+import logging
+import threading
+
+# Playback priorities; when every channel is busy a sound may take over the
+# channel of one with a lower priority
+PRIORITY_PREVIEW = 0
+PRIORITY_TIMER = 10
+PRIORITY_ALARM = 20
+
+# Channels mixed at once unless AudioManager is given another cap
+MAX_CHANNELS = 8
+
+logger = logging.getLogger("alarmclock")
+
+
+class PlaybackHandle:
+    """One sound playing on a channel of a ChannelPool.
+
+    Volume, fades and stop act on this sound only. Once the handle is
+    stopped, preempted or its sound has ended, every method is a no-op, so
+    a stale handle (or a ramp still holding it) can never touch a channel
+    that was handed to another sound.
+    """
+
+    __slots__ = ("pool", "sound", "priority", "seq", "index", "ramp", "stream", "preempted", "_channel")
+
+    def __init__(self, pool, index, sound, priority, seq):
+        self.pool = pool
+        self.sound = sound
+        self.priority = priority
+        self.seq = seq
+        self.index = index
+        self.ramp = None
+        # WavStream feeding the channel chunk by chunk, for streamed files
+        self.stream = None
+        self.preempted = False
+        self._channel = pool._channels[index]
+
+    @property
+    def playing(self):
+        with self.pool._lock:
+            return self._channel is not None and self._channel.get_busy()
+
+    def set_volume(self, volume):
+        with self.pool._lock:
+            if self._channel is not None:
+                self._channel.set_volume(volume)
+
+    def fade(self, seconds, end_volume, start_volume=None, curve="linear"):
+        """Move the volume to ``end_volume`` over ``seconds`` on the ramp thread"""
+        self._cancel_ramp()
+        with self.pool._lock:
+            if self._channel is None:
+                return
+            if start_volume is None:
+                start_volume = self._channel.get_volume()
+        self.ramp = self.pool.ramps.start(self.set_volume, seconds, curve,
+                                          start_volume=start_volume, end_volume=end_volume)
+
+    def fadeout(self, seconds):
+        """Fade to silence over ``seconds``; the channel is free again once the fade ends"""
+        self._cancel_ramp()
+        self.pool._end(self, int(seconds * 1000))
+
+    def stop(self):
+        self._cancel_ramp()
+        self.pool._end(self, 0)
+
+    def feed(self):
+        """Queue the next chunk of a streamed sound if the channel needs one.
+
+        Returns False once there is nothing left to feed: the handle was
+        stopped or preempted, or a stream that doesn't loop has run out.
+        """
+        with self.pool._lock:
+            channel = self._channel
+            if channel is None:
+                return False
+            if channel.get_queue() is not None:
+                return True
+        # Reading the file may block on disk; do it outside the lock
+        chunk = self.stream.next_chunk()
+        with self.pool._lock:
+            if self._channel is not channel:
+                return False
+            if chunk is None:
+                return channel.get_busy()
+            channel.queue(chunk)
+            return True
+
+    def _cancel_ramp(self):
+        # RampEngine.cancel(None) would cancel every ramp, not just this one's
+        if self.ramp is not None:
+            self.pool.ramps.cancel(self.ramp)
+            self.ramp = None
+
+
+class MusicChannel:
+    """mixer.music behind the Channel interface, so the pool can hand it out.
+
+    The mixer streams a single music file from disk, decoding as it
+    plays; ``play`` takes a path instead of a Sound.
+    """
+
+    def __init__(self, music):
+        self.music = music
+
+    def play(self, path, loops=0):
+        self.music.load(path)
+        self.music.play(loops)
+
+    def stop(self):
+        self.music.stop()
+
+    def fadeout(self, ms):
+        self.music.fadeout(ms)
+
+    def get_busy(self):
+        return self.music.get_busy()
+
+    def set_volume(self, volume):
+        self.music.set_volume(volume)
+
+    def get_volume(self):
+        return self.music.get_volume()
+
+    def get_queue(self):
+        return None
+
+
+class ChannelPool:
+    """Hands out the mixer's channels to sounds, at most ``size`` at a time.
+
+    ``play`` starts a sound on a free channel and returns its
+    PlaybackHandle. When every channel is taken, a fading sound is cut
+    first, then the lowest-priority one (the oldest among equals) provided
+    its priority is lower than the new sound's; otherwise ``play`` returns
+    None and the new sound isn't played. A ringing alarm is never cut off
+    by another alarm. ``play_music`` does the same for the one mixer.music
+    stream, kept apart from the channels.
+
+    Every channel call happens under the pool's lock, which is never held
+    while calling into the RampEngine, so the ramp thread can set volumes
+    through handles without deadlocking.
+    """
+
+    def __init__(self, mixer, ramps, size=MAX_CHANNELS):
+        mixer.set_num_channels(size)
+        self.ramps = ramps
+        self.size = size
+        self.preemptions = 0
+        # mixer.music sits after the regular channels, at index ``size``
+        self._channels = [mixer.Channel(i) for i in range(size)] + [MusicChannel(mixer.music)]
+        self._owners = [None] * (size + 1)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def play(self, sound, priority=PRIORITY_ALARM, loops=-1, volume=1.0):
+        """Start ``sound`` on a channel; None if everything playing outranks it"""
+        return self._play(range(self.size), sound, priority, loops, volume)
+
+    def play_music(self, path, priority=PRIORITY_ALARM, loops=-1, volume=1.0):
+        """Stream the file at ``path`` through mixer.music; None if it is playing something as important"""
+        return self._play((self.size,), path, priority, loops, volume)
+
+    def _play(self, indexes, sound, priority, loops, volume):
+        """Start ``sound`` on a free slot among ``indexes``, preempting a less important one"""
+        victim = None
+        with self._lock:
+            index = self._free_index(indexes)
+            if index is None:
+                victim = min((self._owners[i] for i in indexes),
+                             key=lambda h: (h._channel is not None, h.priority, h.seq))
+                if victim._channel is not None and victim.priority >= priority:
+                    return None
+                index = victim.index
+                if victim._channel is None:
+                    victim = None  # Already fading out; nothing is lost
+                else:
+                    victim._channel = None
+                    victim.preempted = True
+                    self.preemptions += 1
+            channel = self._channels[index]
+            handle = self._owners[index] = PlaybackHandle(self, index, sound, priority, next(self._seq))
+            channel.stop()
+            channel.set_volume(volume)
+            channel.play(sound, loops)
+        if victim is not None:
+            logger.info("Preempted a priority %d sound for priority %d", victim.priority, priority)
+            victim._cancel_ramp()
+        return handle
+
+    def _free_index(self, indexes):
+        for index in indexes:
+            owner = self._owners[index]
+            if owner is None:
+                return index
+            if not self._channels[index].get_busy():
+                # Played to the end, or finished fading out
+                owner._channel = None
+                self._owners[index] = None
+                return index
+        return None
+
+    def _end(self, handle, fade_ms):
+        with self._lock:
+            channel, handle._channel = handle._channel, None
+            if channel is None:
+                return
+            if fade_ms > 0:
+                # The handle keeps the slot until the fade has finished
+                channel.fadeout(fade_ms)
+            else:
+                channel.stop()
+                self._owners[handle.index] = None
+
+    def handles(self):
+        """Handles of the sounds currently playing"""
+        with self._lock:
+            return [h for h in self._owners if h is not None and h._channel is not None
+                    and h._channel.get_busy()]
+
+    def stop_all(self):
+        """Stop every channel; the caller cancels any ramps"""
+        with self._lock:
+            for index, owner in enumerate(self._owners):
+                if owner is not None:
+                    owner._channel = None
+                    self._owners[index] = None
+                self._channels[index].stop()
@@ -0,0 +1,115 @@
+import collections
+import os
+import threading
+
+# Sounds of alarms firing within PRELOAD_LEAD seconds are decoded ahead of
+# time; the schedule is checked every PRELOAD_INTERVAL seconds
+PRELOAD_LEAD = 5 * 60
+PRELOAD_INTERVAL = 60
+
+
+class SoundCache:
+    """Size-bounded LRU cache of decoded sounds.
+
+    Entries are keyed by (path, mtime, size), so editing or replacing a file
+    on disk misses the cache instead of playing stale audio. ``load(path)``
+    decodes a file and returns ``(sound, nbytes)``; the least recently used
+    sounds are evicted once the decoded bytes exceed ``budget_bytes``. A
+    sound larger than the whole budget is returned but not kept.
+
+    Safe to share between the Tk thread and the preload thread.
+    """
+
+    def __init__(self, load, budget_bytes=64 * 2**20):
+        self.load = load
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = 0
+        self._entries = collections.OrderedDict()  # key -> (sound, nbytes)
+        self._keys_by_path = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(path):
+        """Cache key of a file as it is on disk right now; raises OSError if it's missing"""
+        st = os.stat(path)
+        return path, st.st_mtime_ns, st.st_size
+
+    def get(self, path):
+        """Return the decoded sound for ``path``, loading it on a miss"""
+        key = self.key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        # Decode outside the lock; two threads racing on one file just load it twice
+        sound, nbytes = self.load(path)
+        with self._lock:
+            self._store(key, sound, nbytes)
+        return sound
+
+    def preload(self, path):
+        """Make sure ``path`` is decoded and cached; returns False if it can't be loaded.
+
+        Doesn't touch the hit/miss counters, which describe playback only.
+        """
+        try:
+            key = self.key(path)
+            with self._lock:
+                if key in self._entries:
+                    return True
+            sound, nbytes = self.load(path)
+        except Exception:
+            return False
+        with self._lock:
+            self._store(key, sound, nbytes)
+        return True
+
+    def _store(self, key, sound, nbytes):
+        # A file changed on disk leaves its old decode behind; drop it
+        stale = self._keys_by_path.get(key[0])
+        if stale is not None and stale != key:
+            self._discard(stale)
+        if nbytes > self.budget_bytes or key in self._entries:
+            return
+        self._entries[key] = (sound, nbytes)
+        self._keys_by_path[key[0]] = key
+        self.size_bytes += nbytes
+        while self.size_bytes > self.budget_bytes:
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[1]
+            if self._keys_by_path.get(key[0]) == key:
+                del self._keys_by_path[key[0]]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+            self.size_bytes = 0
+
+    def stats(self):
+        """Counters for tuning the budget"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size_bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,216 @@
+import array
+import hashlib
+import json
+import os
+import sys
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.streaming import wav_layout
+from src.utils.synth import DEFAULT_ALARM, cached_pattern
+
+# sounds/ at the repository root, where the default alarm lives
+SOUNDS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                          "sounds")
+# Canonical WAVs and their metadata written by the pipeline
+MANAGED_DIR = os.path.join(SOUNDS_DIR, "managed")
+# Normalization target, about -1 dBFS
+NORMALIZE_PEAK = 0.89
+
+
+def find_sound(path):
+    """Locate a sound file as given or inside SOUNDS_DIR; None if neither exists"""
+    if not path:
+        return None
+    if os.path.isfile(path):
+        return os.path.abspath(path)
+    candidate = os.path.join(SOUNDS_DIR, path)
+    return candidate if not os.path.isabs(path) and os.path.isfile(candidate) else None
+
+
+class SoundInfo:
+    """Result of checking one sound file.
+
+    ``path`` is what to play: the canonical WAV when one was written,
+    otherwise the source itself. ``error`` is set when the file can't be
+    played, in which case the other fields are None. Streamed files aren't
+    decoded, so their ``peak`` is None, and so is their ``duration`` unless
+    they are WAVs.
+    """
+
+    __slots__ = ("source", "path", "duration", "peak", "error")
+
+    def __init__(self, source, path=None, duration=None, peak=None, error=None):
+        self.source = source
+        self.path = path
+        self.duration = duration
+        self.peak = peak
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def describe(self):
+        if self.error:
+            return f"Unplayable: {self.error}"
+        if self.peak is None:
+            return "Streamed from disk" + (f", {self.duration:.1f} s" if self.duration else "")
+        return f"{self.duration:.1f} s, peak {self.peak:.0%}"
+
+    def to_json(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SoundLibrary:
+    """Background pipeline that checks and normalizes chosen alarm sounds.
+
+    ``submit`` queues a file on a single worker thread, which decodes it
+    once through the mixer, measures duration and peak and, for compressed
+    files or when the normalize_sounds setting is on, writes a 16-bit
+    canonical WAV into ``directory``. Outputs are named after the source's
+    path, mtime and size, so they survive restarts and a changed file is
+    processed again. ``resolve`` maps a configured path to the file to play
+    without decoding anything.
+    """
+
+    def __init__(self, audio, settings, directory=MANAGED_DIR):
+        self.audio = audio
+        self.settings = settings
+        self.directory = directory
+        self._infos = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sound-pipeline")
+        # Have the built-in alarm on disk before anything needs it
+        self._executor.submit(self.default_path)
+
+    def default_path(self):
+        """The configured default sound, or the built-in alarm if that file is missing.
+
+        The built-in alarm is synthesized into ``directory`` the first time
+        it is needed, which takes a few milliseconds.
+        """
+        found = find_sound(self.settings.get("default_sound"))
+        if found is None:
+            found = cached_pattern(DEFAULT_ALARM, self.directory)
+        return found
+
+    def _key(self, found):
+        st = os.stat(found)
+        return found, st.st_mtime_ns, st.st_size, self.settings.get("normalize_sounds")
+
+    def _output(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.directory, digest)
+
+    def submit(self, path):
+        """Queue a file for checking; returns a Future for its SoundInfo"""
+        return self._executor.submit(self.process, path)
+
+    def resolve(self, path):
+        """File to play for ``path``: its canonical WAV once written, else the file itself.
+
+        Returns None if the file doesn't exist. Costs a stat, never a decode.
+        """
+        found = find_sound(path)
+        if found is None:
+            return None
+        try:
+            key = self._key(found)
+        except OSError:
+            return None
+        with self._lock:
+            info = self._infos.get(key)
+        if info is not None:
+            return info.path if info.ok else None
+        canonical = self._output(key) + ".wav"
+        return canonical if os.path.isfile(canonical) else found
+
+    def streamed(self, path):
+        """Whether the file at ``path`` is over the stream_threshold_mb setting and plays from disk"""
+        return os.path.getsize(path) > self.settings.get("stream_threshold_mb") * 2**20
+
+    def process(self, path):
+        """Check one file now, on the calling thread, and return its SoundInfo"""
+        found = find_sound(path)
+        if found is None:
+            return SoundInfo(path, error="file not found")
+        key = self._key(found)
+        with self._lock:
+            info = self._infos.get(key)
+        if info is None and self.streamed(found):
+            # Decoding a file this size is what streaming avoids
+            info = self._describe_streamed(found)
+        elif info is None:
+            info = self._load_metadata(key) or self._analyze(found, key)
+            with self._lock:
+                self._infos[key] = info
+        return info
+
+    def _describe_streamed(self, found):
+        try:
+            layout = wav_layout(found)
+        except OSError as e:
+            return SoundInfo(found, error=str(e))
+        if layout is None:
+            return SoundInfo(found, found)
+        channels, sample_rate, sample_width, _, data_bytes = layout
+        return SoundInfo(found, found, data_bytes / (channels * sample_width * sample_rate))
+
+    def _load_metadata(self, key):
+        try:
+            with open(self._output(key) + ".json", encoding="utf-8") as f:
+                info = SoundInfo(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        return info if not info.ok or os.path.isfile(info.path) else None
+
+    def _analyze(self, found, key):
+        # Decoding needs the mixer; wait for start rather than forcing it. A
+        # mixer that failed to start says nothing about the file, so that
+        # error propagates instead of being recorded.
+        mixer = self.audio.ready.result()
+        frequency, sample_format, channels = mixer.get_init()
+        if abs(sample_format) != 16:
+            raise ValueError(f"unsupported mixer format {sample_format}")
+        try:
+            sound = mixer.Sound(found)
+            samples = array.array("h", sound.get_raw())
+        except Exception as e:
+            info = SoundInfo(found, error=str(e) or type(e).__name__)
+        else:
+            info = self._canonicalize(found, key, samples, frequency, channels)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._output(key) + ".json", "w", encoding="utf-8") as f:
+            json.dump(info.to_json(), f)
+        return info
+
+    def _canonicalize(self, found, key, samples, frequency, channels):
+        if not samples:
+            return SoundInfo(found, error="no audio")
+        duration = len(samples) / channels / frequency
+        peak = max(max(samples), -min(samples)) / 32768
+        if peak == 0:
+            return SoundInfo(found, error="silent")
+        gain = NORMALIZE_PEAK / peak if self.settings.get("normalize_sounds") else 1.0
+        if gain == 1.0 and found.lower().endswith(".wav"):
+            # Already cheap to decode; nothing to write
+            return SoundInfo(found, found, duration, peak)
+        if gain != 1.0:
+            samples = array.array("h", (max(-32768, min(32767, int(s * gain))) for s in samples))
+        if sys.byteorder == "big":
+            samples.byteswap()
+        os.makedirs(self.directory, exist_ok=True)
+        canonical = self._output(key) + ".wav"
+        partial = canonical + ".part"
+        with wave.open(partial, "wb") as out:
+            out.setnchannels(channels)
+            out.setsampwidth(2)
+            out.setframerate(frequency)
+            out.writeframes(samples.tobytes())
+        os.replace(partial, canonical)
+        return SoundInfo(found, canonical, duration, min(peak * gain, 1.0))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,170 @@
+import mmap
+import os
+import struct
+import sys
+import threading
+
+# Seconds of audio per streamed chunk; one chunk plays while the next waits
+# in the channel's queue
+CHUNK_SECONDS = 1.0
+
+# WAVE_FORMAT_PCM and WAVE_FORMAT_EXTENSIBLE
+PCM_TAGS = (0x0001, 0xFFFE)
+
+# Lets a chunk's mapped pages go once it is copied out (Linux; None elsewhere)
+MADV_DONTNEED = getattr(mmap, "MADV_DONTNEED", None)
+
+
+def wav_layout(path):
+    """``(channels, sample_rate, sample_width, data_offset, data_bytes)`` of a PCM WAV.
+
+    Reads only the chunk headers. Returns None for anything that isn't a
+    PCM WAV.
+    """
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:] != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                body = f.read(size + (size & 1))
+                if len(body) < 16:
+                    return None
+                fmt = struct.unpack("<HHIIHH", body[:16])
+            elif chunk_id == b"data":
+                if fmt is None or fmt[0] not in PCM_TAGS or not (fmt[1] and fmt[2] and fmt[5] >= 8):
+                    return None
+                offset = f.tell()
+                # Writers that couldn't seek back leave the size at 0 or 0xFFFFFFFF
+                available = os.fstat(f.fileno()).st_size - offset
+                return fmt[1], fmt[2], fmt[5] // 8, offset, min(size, available) if size else available
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+class WavStream:
+    """A PCM WAV read through a memory map, one mixer Sound per chunk.
+
+    Only the chunk being built, the one playing and the one queued behind
+    it are ever held in memory, ``ceiling_bytes`` in total. Where the
+    platform allows, mapped pages are released from the process as soon as
+    their chunk has been copied, so RSS doesn't grow as playback advances
+    through the file.
+    """
+
+    def __init__(self, mixer, path, layout, chunk_seconds=CHUNK_SECONDS, loop=True):
+        channels, sample_rate, sample_width, offset, data_bytes = layout
+        frame = channels * sample_width
+        self.mixer = mixer
+        self.path = path
+        self.loop = loop
+        self.chunk_bytes = max(int(sample_rate * chunk_seconds), 1) * frame
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self._start = self._position = offset
+        self._end = offset + data_bytes // frame * frame
+
+    @property
+    def ceiling_bytes(self):
+        return 3 * self.chunk_bytes
+
+    def next_chunk(self):
+        """The next chunk as a Sound, wrapping around when looping; None at the end"""
+        if self._position >= self._end:
+            if not self.loop or self._end == self._start:
+                return None
+            self._position = self._start
+        end = min(self._position + self.chunk_bytes, self._end)
+        chunk = self.mixer.Sound(buffer=self._map[self._position:end])
+        if MADV_DONTNEED is not None:
+            start = self._position - self._position % mmap.PAGESIZE
+            self._map.madvise(MADV_DONTNEED, start, end - start)
+        self._position = end
+        return chunk
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def open_wav_stream(mixer, path, chunk_seconds=CHUNK_SECONDS):
+    """A WavStream for ``path`` if the mixer can play its samples as they are, else None"""
+    frequency, sample_format, channels = mixer.get_init()
+    layout = wav_layout(path)
+    # Mixer Sounds built from a buffer must already be in the mixer's format
+    if (layout is None or layout[:3] != (channels, frequency, 2)
+            or sample_format != -16 or sys.byteorder != "little"):
+        return None
+    return WavStream(mixer, path, layout, chunk_seconds)
+
+
+class Streamer:
+    """Keeps streamed sounds fed from one "audio-stream" thread.
+
+    Every ``step`` seconds each handle queues its next chunk if its channel
+    has nothing queued. Handles that were stopped, preempted or ran out are
+    dropped and their streams closed. ``step`` has to stay well below the
+    chunk length, or playback gaps between chunks.
+    """
+
+    def __init__(self, step=0.25):
+        self.step = step
+        self._handles = set()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def add(self, handle):
+        with self._condition:
+            self._handles.add(handle)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audio-stream", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def active(self):
+        with self._condition:
+            return len(self._handles)
+
+    def close(self):
+        """Stop feeding and close every stream"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+        for handle in self._handles:
+            handle.stream.close()
+        self._handles.clear()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._handles and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                handles = list(self._handles)
+            # Feeding takes the channel pool's lock; don't hold ours meanwhile
+            for handle in handles:
+                try:
+                    fed = handle.feed()
+                except Exception:
+                    # The mixer went away (quit); nothing left to feed
+                    fed = False
+                if not fed:
+                    with self._condition:
+                        self._handles.discard(handle)
+                    handle.stream.close()
+            with self._condition:
+                if not self._closed:
+                    self._condition.wait(self.step)
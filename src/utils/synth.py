@@ -0,0 +1,159 @@
+import array
+import fractions
+import hashlib
+import math
+import os
+import sys
+import threading
+import wave
+
+SAMPLE_RATE = 44100
+FULL_SCALE = 32767
+# Linear fade at both ends of each tone in a pattern, so steps don't click
+FADE = 0.005
+# Bump when synthesis changes so cached files are generated again
+VERSION = 1
+
+# Built-in alarm used when the configured default sound is missing: two
+# short beeps and a pause, one second per loop
+DEFAULT_ALARM = ((880.0, 0.25), (None, 0.1), (880.0, 0.25), (None, 0.4))
+
+# numpy, imported on first synthesis if it is installed; False until tried
+numpy = False
+
+
+def import_numpy():
+    """Return numpy if it can be imported, else None; tried once"""
+    global numpy
+    if numpy is False:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        numpy = np
+    return numpy
+
+
+def _frames(duration, sample_rate):
+    return int(round(duration * sample_rate))
+
+
+def _from_numpy(values):
+    # Truncates toward zero like int(), so both paths produce the same samples
+    return array.array("h", values.astype(numpy.int16).tobytes())
+
+
+def silence(duration, sample_rate=SAMPLE_RATE):
+    return array.array("h", bytes(2 * _frames(duration, sample_rate)))
+
+
+def tone(frequency, duration, amplitude=0.5, sample_rate=SAMPLE_RATE, fade=0.0):
+    """Sine tone as 16-bit mono samples.
+
+    A frequency of n/d Hz (d up to 100) repeats every d * sample_rate /
+    gcd(n, d * sample_rate) samples; only that period is computed and the
+    rest is tiled with array repetition.
+    """
+    count = _frames(duration, sample_rate)
+    ratio = fractions.Fraction(frequency).limit_denominator(100)
+    if ratio == frequency:
+        cycle_rate = ratio.denominator * sample_rate
+        period = min(cycle_rate // math.gcd(ratio.numerator, cycle_rate), count)
+    else:
+        period = count
+    step = 2 * math.pi * frequency / sample_rate
+    scale = amplitude * FULL_SCALE
+    np = import_numpy()
+    if np is not None:
+        cycle = _from_numpy(np.sin(np.arange(period) * step) * scale)
+    else:
+        sin = math.sin
+        cycle = array.array("h", [int(scale * sin(k * step)) for k in range(period)])
+    samples = cycle * -(-count // period) if period else cycle
+    del samples[count:]
+    _fade(samples, fade, sample_rate)
+    return samples
+
+
+def chirp(start, end, duration, amplitude=0.5, sample_rate=SAMPLE_RATE, fade=0.0):
+    """Sine sweeping linearly from ``start`` to ``end`` Hz, as 16-bit mono samples"""
+    count = _frames(duration, sample_rate)
+    # Phase at sample k is 2 pi (start t + (end - start) t^2 / (2 duration))
+    linear = 2 * math.pi * start / sample_rate
+    quadratic = math.pi * (end - start) / (count * sample_rate) if count else 0.0
+    scale = amplitude * FULL_SCALE
+    np = import_numpy()
+    if np is not None:
+        k = np.arange(count, dtype=np.float64)
+        samples = _from_numpy(np.sin(k * (linear + quadratic * k)) * scale)
+    else:
+        sin = math.sin
+        samples = array.array("h", [int(scale * sin(k * (linear + quadratic * k)))
+                                    for k in range(count)])
+    _fade(samples, fade, sample_rate)
+    return samples
+
+
+def _fade(samples, fade, sample_rate):
+    length = min(_frames(fade, sample_rate), len(samples) // 2)
+    for i in range(length):
+        gain = i / length
+        samples[i] = int(samples[i] * gain)
+        samples[-1 - i] = int(samples[-1 - i] * gain)
+
+
+def pattern(steps, repeat=1, amplitude=0.5, sample_rate=SAMPLE_RATE, fade=FADE):
+    """Concatenate ``(frequency, seconds)`` steps and repeat the result.
+
+    A frequency is a number for a tone, a ``(start, end)`` pair for a chirp
+    or None (or 0) for silence.
+    """
+    samples = array.array("h")
+    for frequency, duration in steps:
+        if not frequency:
+            samples += silence(duration, sample_rate)
+        elif isinstance(frequency, (tuple, list)):
+            samples += chirp(frequency[0], frequency[1], duration, amplitude, sample_rate, fade)
+        else:
+            samples += tone(frequency, duration, amplitude, sample_rate, fade)
+    return samples * repeat
+
+
+def write_wav(path, samples, sample_rate=SAMPLE_RATE, channels=1):
+    """Write mono samples as a 16-bit WAV in one buffer write, duplicated to ``channels``.
+
+    The file appears atomically, so a reader never sees half of it.
+    """
+    if channels > 1:
+        mono, samples = samples, array.array("h", bytes(2 * len(samples) * channels))
+        for channel in range(channels):
+            samples[channel::channels] = mono
+    elif sys.byteorder == "big":
+        samples = array.array("h", samples)
+    if sys.byteorder == "big":
+        samples.byteswap()
+    partial = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+    with wave.open(partial, "wb") as out:
+        out.setnchannels(channels)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        out.writeframes(samples.tobytes())
+    os.replace(partial, path)
+
+
+def cached_pattern(steps, directory, repeat=1, amplitude=0.5, sample_rate=SAMPLE_RATE,
+                   channels=1, fade=FADE):
+    """Path of a WAV rendering ``pattern(steps, ...)``, generated into ``directory`` on first use.
+
+    Files are named after a hash of every parameter, so a changed pattern
+    gets a new file and an unchanged one is never rendered twice.
+    """
+    steps = tuple((tuple(map(float, f)) if isinstance(f, (tuple, list)) else float(f or 0), float(d))
+                  for f, d in steps)
+    params = (VERSION, steps, repeat, float(amplitude), sample_rate, channels, float(fade))
+    digest = hashlib.sha1(repr(params).encode("utf-8")).hexdigest()[:20]
+    path = os.path.join(directory, f"synth-{digest}.wav")
+    if not os.path.isfile(path):
+        os.makedirs(directory, exist_ok=True)
+        write_wav(path, pattern(steps, repeat, amplitude, sample_rate, fade), sample_rate, channels)
+    return path
@@ -0,0 +1,123 @@
+from src.utils.channel_pool import ChannelPool, PRIORITY_PREVIEW, PRIORITY_TIMER, PRIORITY_ALARM
+
+
+class FakeChannel:
+    def __init__(self):
+        self.sound = None
+        self.volume = 1.0
+        self.fading = False
+
+    def play(self, sound, loops=0):
+        self.sound = sound
+        self.fading = False
+
+    def stop(self):
+        self.sound = None
+
+    def fadeout(self, ms):
+        self.fading = True
+
+    def get_busy(self):
+        return self.sound is not None
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def get_volume(self):
+        return self.volume
+
+    def get_queue(self):
+        return None
+
+
+class FakeMusic(FakeChannel):
+    def load(self, path):
+        self.sound = path
+
+    def play(self, loops=0):
+        self.fading = False
+
+
+class FakeMixer:
+    def __init__(self):
+        self.channels = {}
+        self.music = FakeMusic()
+
+    def set_num_channels(self, count):
+        self.count = count
+
+    def Channel(self, index):
+        return self.channels.setdefault(index, FakeChannel())
+
+
+class FakeRamps:
+    def start(self, set_volume, seconds, curve, start_volume, end_volume):
+        set_volume(end_volume)
+        return object()
+
+    def cancel(self, ramp):
+        pass
+
+
+def make_pool(size=2):
+    mixer = FakeMixer()
+    return ChannelPool(mixer, FakeRamps(), size), mixer
+
+
+def test_alarm_preempts_lower_priorities_lowest_first():
+    pool, mixer = make_pool()
+    timer = pool.play("timer", PRIORITY_TIMER)
+    preview = pool.play("preview", PRIORITY_PREVIEW)
+    first = pool.play("alarm 1", PRIORITY_ALARM)
+    assert preview.preempted and not timer.preempted
+    second = pool.play("alarm 2", PRIORITY_ALARM)
+    assert timer.preempted
+    assert {channel.sound for channel in mixer.channels.values()} == {"alarm 1", "alarm 2"}
+    assert pool.preemptions == 2
+    assert first.playing and second.playing
+
+
+def test_alarm_never_preempts_another_alarm():
+    pool, mixer = make_pool()
+    ringing = [pool.play(f"alarm {i}", PRIORITY_ALARM) for i in range(2)]
+    assert pool.play("alarm 3", PRIORITY_ALARM) is None
+    assert pool.play("timer", PRIORITY_TIMER) is None
+    assert all(handle.playing and not handle.preempted for handle in ringing)
+    assert pool.preemptions == 0
+
+
+def test_music_stream_is_never_taken_by_an_equal_priority():
+    pool, mixer = make_pool()
+    music = pool.play_music("long.mp3", PRIORITY_ALARM)
+    assert pool.play_music("other.mp3", PRIORITY_ALARM) is None
+    assert mixer.music.sound == "long.mp3" and music.playing
+
+
+def test_fading_sound_gives_up_its_channel_first():
+    pool, mixer = make_pool()
+    fading = pool.play("alarm 1", PRIORITY_ALARM)
+    pool.play("alarm 2", PRIORITY_ALARM)
+    fading.fadeout(2)
+    replacement = pool.play("alarm 3", PRIORITY_ALARM)
+    assert replacement is not None and replacement.index == fading.index
+    # Cut while already fading out: not counted as taken from a ringing sound
+    assert pool.preemptions == 0
+
+
+def test_stale_handles_never_touch_a_reused_channel():
+    pool, mixer = make_pool(size=1)
+    preview = pool.play("preview", PRIORITY_PREVIEW)
+    alarm = pool.play("alarm", PRIORITY_ALARM)
+    channel = mixer.channels[0]
+    preview.set_volume(0.1)
+    preview.fade(1, 0.0)
+    preview.stop()
+    assert channel.sound == "alarm" and channel.volume == 1.0
+    assert not preview.playing and alarm.playing
+
+    alarm.stop()
+    assert channel.sound is None
+    alarm.stop()
+    assert pool.handles() == []
+    # The stopped handle's channel is free for the next sound
+    assert pool.play("timer", PRIORITY_TIMER).index == 0
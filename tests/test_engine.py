@@ -0,0 +1,57 @@
+import datetime
+
+import pytest
+
+from src.core.alarm import Alarm
+from src.core.engine import AlarmEngine
+from src.core.recurrence import Recurrence, INTERVAL
+
+
+class FakeSettings:
+    def get(self, key):
+        return 30.0
+
+    def subscribe(self, key, callback):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.deactivated = []
+
+    def deactivate_alarm(self, alarm):
+        self.deactivated.append(alarm.id)
+
+
+class Engine(AlarmEngine):
+    def fire_due(self, due):
+        pass
+
+
+def make_engine():
+    return Engine(FakeDatabase(), FakeSettings(), latency=None)
+
+
+def test_retire_deactivates_a_ringing_one_shot():
+    engine = make_engine()
+    alarm = Alarm(1, 7 * 60, None)
+    engine.alarms[alarm.id] = alarm
+    engine.retire(alarm)
+    assert engine.db.deactivated == [1]
+    assert alarm.id not in engine.alarms
+
+
+def test_retire_leaves_an_alarm_deleted_while_ringing_alone():
+    engine = make_engine()
+    daily = Alarm(1, 7 * 60, None, rule=Recurrence(INTERVAL, 1, datetime.date.today()))
+    one_shot = Alarm(2, 7 * 60, None)
+    for alarm in (daily, one_shot):
+        engine.retire(alarm)
+    assert engine.alarms == {}
+    assert len(engine.scheduler) == 0
+    assert engine.db.deactivated == []
+
+
+def test_engine_needs_fire_due():
+    with pytest.raises(TypeError):
+        AlarmEngine(FakeDatabase(), FakeSettings(), latency=None)
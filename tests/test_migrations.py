@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+from src.data import migrations
+from src.data.migrations import migrate, schema_version, SCHEMA_VERSION
+
+
+def baseline_db():
+    """A database as the app first shipped it: no user_version, a few alarms"""
+    conn = sqlite3.connect(":memory:")
+    migrations.initial_schema(conn)
+    conn.executemany("INSERT INTO alarms (time, sound_path, note, active) VALUES (?, ?, ?, ?)",
+                     [("07:00", "a.wav", "wake", 1), ("12:30", None, "", 0), ("23:59", "b.wav", "bed", 1)])
+    conn.commit()
+    return conn
+
+
+def test_baseline_database_migrates_and_keeps_its_alarms():
+    conn = baseline_db()
+    before = conn.execute("SELECT id, time, sound_path, note, active FROM alarms ORDER BY id").fetchall()
+    assert migrate(conn) == 0
+    assert schema_version(conn) == SCHEMA_VERSION
+    after = conn.execute("SELECT id, time, sound_path, note, active FROM alarms ORDER BY id").fetchall()
+    assert after == before
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(alarms)")}
+    assert {"repeat_rule", "repeat_value", "repeat_anchor"} <= columns
+    conn.execute("SELECT alarm_id, kind, at, duration FROM alarm_events")
+
+
+def test_current_database_is_left_alone(monkeypatch):
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    schema = conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall()
+
+    def must_not_run(conn):
+        pytest.fail("a step ran on a current database")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", [(version, must_not_run) for version, _ in migrations.MIGRATIONS])
+    assert migrate(conn) == SCHEMA_VERSION
+    assert conn.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall() == schema
+
+
+def test_failing_step_rolls_back(monkeypatch):
+    conn = baseline_db()
+
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (id INTEGER)")
+        raise sqlite3.OperationalError("step failed")
+
+    steps = migrations.MIGRATIONS + [(SCHEMA_VERSION + 1, broken)]
+    monkeypatch.setattr(migrations, "MIGRATIONS", steps)
+    monkeypatch.setattr(migrations, "SCHEMA_VERSION", SCHEMA_VERSION + 1)
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn)
+    # Every step before it is committed; the failing one left nothing behind
+    assert schema_version(conn) == SCHEMA_VERSION
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "half_done" not in tables
+    assert conn.execute("SELECT COUNT(*) FROM alarms").fetchone()[0] == 3
@@ -0,0 +1,60 @@
+import datetime
+
+import pytest
+
+from src.core.recurrence import Recurrence, WEEKDAYS, INTERVAL, MONTHLY, WORKDAY_MASK
+
+D = datetime.date
+# 2026-10-19 is a Monday
+ANCHOR = D(2026, 10, 19)
+
+
+def test_weekdays_picks_next_selected_day():
+    rule = Recurrence(WEEKDAYS, WORKDAY_MASK, ANCHOR)
+    assert rule.next_date(D(2026, 10, 21)) == D(2026, 10, 21)  # Wednesday
+    assert rule.next_date(D(2026, 10, 24)) == D(2026, 10, 26)  # Saturday -> Monday
+    sundays = Recurrence(WEEKDAYS, 1 << 6, ANCHOR)
+    assert sundays.next_date(D(2026, 10, 26)) == D(2026, 11, 1)
+
+
+def test_monthly_skips_months_without_the_day():
+    rule = Recurrence(MONTHLY, 31, D(2026, 1, 1))
+    assert rule.next_date(D(2026, 1, 31)) == D(2026, 1, 31)
+    assert rule.next_date(D(2026, 2, 1)) == D(2026, 3, 31)
+    assert rule.next_date(D(2026, 4, 1)) == D(2026, 5, 31)
+    leap = Recurrence(MONTHLY, 29, D(2027, 1, 1))
+    assert leap.next_date(D(2027, 1, 30)) == D(2027, 3, 29)
+    assert leap.next_date(D(2028, 2, 1)) == D(2028, 2, 29)
+
+
+def test_interval_counts_from_anchor():
+    rule = Recurrence(INTERVAL, 3, ANCHOR)
+    assert rule.next_date(ANCHOR) == ANCHOR
+    assert rule.next_date(D(2026, 10, 20)) == D(2026, 10, 22)
+    assert rule.next_date(D(2026, 10, 22)) == D(2026, 10, 22)
+    # 74 days after the anchor; the next multiple of 3 is 75
+    assert rule.next_date(D(2027, 1, 1)) == D(2027, 1, 2)
+
+
+@pytest.mark.parametrize("kind, value", [(WEEKDAYS, 1 << 2), (INTERVAL, 2), (MONTHLY, 5)])
+def test_no_occurrence_before_anchor(kind, value):
+    anchor = D(2027, 3, 1)
+    rule = Recurrence(kind, value, anchor)
+    first = rule.next_date(D(2026, 10, 18))
+    assert first >= anchor
+    assert first == rule.next_date(anchor)
+
+
+def test_columns_round_trip():
+    for rule in (Recurrence(WEEKDAYS, 0b1010101, ANCHOR), Recurrence(INTERVAL, 14, ANCHOR),
+                 Recurrence(MONTHLY, 31, ANCHOR)):
+        copy = Recurrence.from_columns(*rule.to_columns())
+        assert (copy.kind, copy.value, copy.anchor) == (rule.kind, rule.value, rule.anchor)
+    assert Recurrence.from_columns(None, None, None) is None
+
+
+@pytest.mark.parametrize("kind, value", [("yearly", 1), (WEEKDAYS, 0), (WEEKDAYS, 128),
+                                         (INTERVAL, 0), (MONTHLY, 0), (MONTHLY, 32)])
+def test_rejects_invalid_rules(kind, value):
+    with pytest.raises(ValueError):
+        Recurrence(kind, value, ANCHOR)
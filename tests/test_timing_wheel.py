@@ -0,0 +1,31 @@
+import random
+
+from src.core.alarm import Alarm
+from src.core.scheduler import HeapScheduler
+from src.core.timing_wheel import TimingWheelScheduler
+
+
+def test_wheel_matches_heap_on_fractional_deadlines():
+    rng = random.Random(4)
+    start = 1_700_000_000.0
+    heap = HeapScheduler()
+    wheel = TimingWheelScheduler(now=start)
+    for alarm_id in range(500):
+        # Mostly sub-second deadlines like a recurring snooze's time.time() + n * 60
+        fire_at = start + rng.uniform(0, 3 * 3600)
+        alarm = Alarm(alarm_id, 0, None)
+        heap.add(alarm, fire_at)
+        wheel.add(alarm, fire_at)
+
+    now = start
+    while heap.next_deadline() is not None:
+        now += rng.choice((rng.uniform(0.01, 1.5), rng.uniform(1, 120)))
+        expected = sorted(heap.pop_due(now, with_deadlines=True), key=lambda item: item[1].id)
+        popped = sorted(wheel.pop_due(now, with_deadlines=True), key=lambda item: item[1].id)
+        assert [(fire_at, alarm.id) for fire_at, alarm in popped] == \
+               [(fire_at, alarm.id) for fire_at, alarm in expected]
+        assert wheel.next_deadline() == heap.next_deadline()
+        # Nothing left behind that is already due, or the checker would spin
+        deadline = wheel.next_deadline()
+        assert deadline is None or deadline > now
+    assert len(wheel) == 0
@@ -0,0 +1,107 @@
+import datetime
+import io
+
+import pytest
+
+from src.core.alarm import Alarm
+from src.core.recurrence import Recurrence, WEEKDAYS, INTERVAL, MONTHLY
+from src.core.scheduler import next_fire_time
+from src.data.transfer import read_csv, read_ics, read_jsonl, to_row, write_csv, write_ics, write_jsonl
+
+ANCHOR = datetime.date(2026, 10, 19)
+
+
+def sample_alarms():
+    return [
+        Alarm(1, 7 * 60, "/sounds/a.wav", "wake, up; now"),
+        Alarm(2, 6 * 60 + 45, "/sounds/b.wav", "workdays", rule=Recurrence(WEEKDAYS, 0b0011111, ANCHOR)),
+        Alarm(3, 22 * 60, "/sounds/c.wav", "every third day", rule=Recurrence(INTERVAL, 3, ANCHOR)),
+        Alarm(4, 9 * 60 + 5, "/sounds/d.wav", "rent", rule=Recurrence(MONTHLY, 31, ANCHOR)),
+    ]
+
+
+def expected_row(alarm):
+    repeat = alarm.rule.to_columns() if alarm.rule else (None, None, None)
+    return (alarm.time, alarm.sound_path, alarm.note, True) + repeat
+
+
+def rows(records):
+    result = []
+    for _, record in records:
+        assert not isinstance(record, Exception), record
+        result.append(to_row(record))
+    return result
+
+
+@pytest.mark.parametrize("write, read", [(write_csv, read_csv), (write_jsonl, read_jsonl)])
+def test_tabular_round_trip(write, read):
+    alarms = sample_alarms()
+    f = io.StringIO()
+    assert write(f, alarms) == len(alarms)
+    f.seek(0)
+    assert rows(read(f)) == [expected_row(alarm) for alarm in alarms]
+
+
+def test_ics_round_trip():
+    alarms = sample_alarms()
+    f = io.StringIO(newline="")
+    assert write_ics(f, alarms) == len(alarms)
+    f.seek(0)
+    imported = rows(read_ics(f))
+    one_shot, weekdays, interval, monthly = imported
+    assert one_shot == expected_row(alarms[0])
+    # Interval series start on their anchor, so the anchor comes back exactly
+    assert interval == expected_row(alarms[2])
+    # The others come back anchored on their first occurrence, which rings the same days
+    assert weekdays[:6] == expected_row(alarms[1])[:6]
+    assert weekdays[6] == ANCHOR.isoformat()
+    assert monthly[:6] == expected_row(alarms[3])[:6]
+    assert monthly[6] == "2026-10-31"
+
+
+def ics(*event_lines):
+    lines = ["BEGIN:VCALENDAR", "BEGIN:VEVENT", *event_lines, "END:VEVENT", "END:VCALENDAR"]
+    return io.StringIO("\r\n".join(lines) + "\r\n", newline="")
+
+
+def read_one(f):
+    (_, record), = read_ics(f)
+    if isinstance(record, Exception):
+        raise record
+    return to_row(record)
+
+
+@pytest.mark.parametrize("rrule", ["FREQ=DAILY;COUNT=5", "FREQ=WEEKLY;BYDAY=MO;UNTIL=20270101T000000Z"])
+def test_ics_rejects_count_and_until(rrule):
+    with pytest.raises(ValueError, match="COUNT or UNTIL"):
+        read_one(ics("DTSTART:20261019T070000", f"RRULE:{rrule}"))
+
+
+def test_rrule_keeps_dtstart_as_its_anchor():
+    row = read_one(ics("DTSTART:20270301T070000", "RRULE:FREQ=WEEKLY;BYDAY=MO,WE"))
+    assert row[4:] == (WEEKDAYS, 0b101, "2027-03-01")
+    row = read_one(ics("DTSTART:20270305T070000", "RRULE:FREQ=MONTHLY"))
+    assert row[4:] == (MONTHLY, 5, "2027-03-05")
+
+
+def test_one_off_event_must_be_the_next_occurrence_of_its_time():
+    next_day = datetime.date.fromtimestamp(next_fire_time(7 * 60))
+    assert read_one(ics(f"DTSTART:{next_day:%Y%m%d}T070000"))[4:] == (None, None, None)
+    for day in (datetime.date(2020, 1, 1), next_day + datetime.timedelta(days=7)):
+        with pytest.raises(ValueError, match="one-shot"):
+            read_one(ics(f"DTSTART:{day:%Y%m%d}T070000"))
+
+
+def test_csv_anchor_without_a_rule_must_be_the_next_occurrence():
+    f = io.StringIO("time,repeat_anchor\n07:00,2020-01-01\n07:00,not-a-date\n")
+    (_, past), (_, garbage) = read_csv(f)
+    with pytest.raises(ValueError, match="one-shot"):
+        to_row(past)
+    with pytest.raises(ValueError, match="invalid repeat_anchor"):
+        to_row(garbage)
+
+
+@pytest.mark.parametrize("time", ["24:00", "7:60", "noon", ""])
+def test_rejects_bad_times(time):
+    with pytest.raises(ValueError, match="invalid time"):
+        to_row({"time": time})
@@ -0,0 +1,85 @@
+import datetime
+
+import pytest
+
+from src.core.scheduler import create_scheduler
+from src.core.window import AlarmWindow
+from src.data.database import Database
+
+TODAY = datetime.date(2026, 10, 19)
+TOMORROW = TODAY + datetime.timedelta(days=1)
+
+
+def at(day, hour, minute):
+    return datetime.datetime.combine(day, datetime.time(hour, minute)).timestamp()
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "alarms.db"))
+    db.insert_alarms([(time, None, time, active, None, None, None)
+                      for time, active in [("06:30", 1), ("08:00", 1), ("12:00", 0), ("20:00", 1)]])
+    yield db
+    db.close()
+
+
+def make_window(db):
+    scheduler = create_scheduler("heap")
+    alarms = {}
+    # One alarm per page so the window stops right after the horizon
+    window = AlarmWindow(db, scheduler, alarms, page_size=1, horizon=3600, now=at(TODAY, 6, 0))
+    with scheduler.condition:
+        window.refill(now=at(TODAY, 6, 0))
+    return window, scheduler, alarms
+
+
+def deadlines(scheduler, alarms):
+    return {alarm.time: scheduler.deadline(alarm) for alarm in alarms.values()}
+
+
+def test_alarms_past_loaded_until_load_on_a_later_refill(db):
+    window, scheduler, alarms = make_window(db)
+    assert deadlines(scheduler, alarms) == {"06:30": at(TODAY, 6, 30), "08:00": at(TODAY, 8, 0)}
+    assert not window.covers(at(TODAY, 20, 0))
+
+    with scheduler.condition:
+        window.refill(now=at(TODAY, 19, 30))
+    assert deadlines(scheduler, alarms)["20:00"] == at(TODAY, 20, 0)
+    # The inactive alarm was walked past, never loaded
+    assert "12:00" not in deadlines(scheduler, alarms)
+
+
+def test_keep_outside_the_window_hands_the_alarm_back_to_the_walk(db):
+    window, scheduler, alarms = make_window(db)
+    first = next(alarm for alarm in alarms.values() if alarm.time == "06:30")
+    with scheduler.condition:
+        # Retired for today; its next fire is tomorrow, far past the window
+        window.keep(first, at(TOMORROW, 6, 30))
+    assert first.id not in alarms
+    assert first not in scheduler
+
+    with scheduler.condition:
+        window.refill(now=at(TOMORROW, 6, 0))
+    assert scheduler.deadline(first) == at(TOMORROW, 6, 30)
+
+
+def test_keep_inside_the_window_is_not_reloaded(db):
+    window, scheduler, alarms = make_window(db)
+    second = next(alarm for alarm in alarms.values() if alarm.time == "08:00")
+    snoozed = at(TODAY, 6, 40)
+    with scheduler.condition:
+        window.keep(second, snoozed)
+        window.refill(now=at(TODAY, 19, 30))
+    # The walk skipped it rather than putting it back at 08:00
+    assert scheduler.deadline(second) == snoozed
+    assert alarms[second.id] is second
+
+
+def test_release_lets_the_walk_reload_the_alarm(db):
+    window, scheduler, alarms = make_window(db)
+    first = next(alarm for alarm in alarms.values() if alarm.time == "06:30")
+    with scheduler.condition:
+        window.release(first)
+        assert first not in scheduler
+        window.refill(now=at(TOMORROW, 6, 0))
+    assert scheduler.deadline(first) == at(TOMORROW, 6, 30)
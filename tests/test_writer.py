@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from src.data.writer import WriteBehindWriter
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "writer.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    conn.close()
+    return path
+
+
+def names(path):
+    conn = sqlite3.connect(path)
+    try:
+        return sorted(row[0] for row in conn.execute("SELECT name FROM items"))
+    finally:
+        conn.close()
+
+
+def test_failing_statement_only_fails_its_own_future(db_path):
+    # A long window so all three statements share one batch
+    writer = WriteBehindWriter(lambda: sqlite3.connect(db_path), flush_interval=5)
+    try:
+        first = writer.submit("INSERT INTO items (name) VALUES (?)", ("a",))
+        duplicate = writer.submit("INSERT INTO items (name) VALUES (?)", ("a",))
+        last = writer.submit("INSERT INTO items (name) VALUES (?)", ("b",))
+        writer.flush(timeout=5)
+    finally:
+        writer.close()
+    assert first.result(0)[1] == 1
+    assert last.result(0)[1] == 1
+    with pytest.raises(sqlite3.IntegrityError):
+        duplicate.result(0)
+    assert names(db_path) == ["a", "b"]
+
+
+def test_flush_waits_for_everything_queued_before_it(db_path):
+    writer = WriteBehindWriter(lambda: sqlite3.connect(db_path), flush_interval=5)
+    try:
+        futures = [writer.submit("INSERT INTO items (name) VALUES (?)", (str(i),)) for i in range(20)]
+        writer.flush(timeout=5)
+        # Resolved and visible to another connection before flush returned
+        assert all(future.done() for future in futures)
+        assert len(names(db_path)) == 20
+        later = writer.submit("INSERT INTO items (name) VALUES (?)", ("later",))
+    finally:
+        writer.close()
+    assert later.result(0)[1] == 1
+    assert "later" in names(db_path)